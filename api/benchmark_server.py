@@ -0,0 +1,90 @@
+"""
+Throughput benchmark for the production server
+Starts serve.py with each worker count in turn and measures requests per
+second for /forecast at a fixed client concurrency.
+
+Usage (from the api folder):
+    python benchmark_server.py --data ../data/data.csv --workers 1 2 4 8
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import requests
+
+SERVE_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "serve.py")
+
+
+def load_payload(data_file, server_id, service):
+    """Same request body tests/test.py sends"""
+    df = pd.read_csv(data_file)
+    df = df[df["server_id"] == server_id].copy()
+    df["Timestamp"] = pd.to_datetime(df["Timestamp"], errors="coerce").dt.strftime("%Y-%m-%d %H:%M:%S")
+    df = df.fillna(0)
+    return {
+        "df": df.to_dict(orient="records"),
+        "server_id": server_id,
+        "service_description_str": service
+    }
+
+
+def wait_ready(url, timeout=120):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            requests.get(url, timeout=1)
+            return
+        except requests.ConnectionError:
+            time.sleep(0.5)
+    raise RuntimeError(f"Server at {url} did not start")
+
+
+def run_load(url, payload, requests_total, concurrency):
+    """Fire requests_total POSTs with `concurrency` clients, return requests per second"""
+    def call(_):
+        with requests.Session() as session:
+            response = session.post(url, json=payload)
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(call, range(requests_total)))
+    return requests_total / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--data", type=str, default=os.path.join("..", "data", "data.csv"))
+    parser.add_argument("--server_id", type=int, default=638939)
+    parser.add_argument("--service", type=str, default="CPU_Usage")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--port", type=int, default=5055)
+    args = parser.parse_args()
+
+    payload = load_payload(args.data, args.server_id, args.service)
+    base_url = f"http://127.0.0.1:{args.port}"
+
+    # Disable the forecast cache so every request pays for the full forecast
+    env = dict(os.environ, FORECAST_CACHE_SIZE="0")
+
+    print(f"{'workers':>8} {'req/s':>10}")
+    for workers in args.workers:
+        proc = subprocess.Popen(
+            [sys.executable, SERVE_SCRIPT, "--workers", str(workers), "--port", str(args.port)],
+            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            wait_ready(f"{base_url}/cache/stats")
+            run_load(f"{base_url}/forecast", payload, args.concurrency, args.concurrency)  # warm up
+            rps = run_load(f"{base_url}/forecast", payload, args.requests, args.concurrency)
+            print(f"{workers:>8} {rps:>10.1f}")
+        finally:
+            proc.terminate()
+            proc.wait()
@@ -0,0 +1,67 @@
+"""
+Columnar payloads for the API (Arrow IPC stream / Parquet)
+JSON row records stay the default; these are used when the client sends
+or accepts one of the columnar media types
+"""
+
+import io
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional, JSON keeps working without it
+    pa = None
+    pq = None
+
+
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+PARQUET = "application/vnd.apache.parquet"
+
+COLUMNAR_TYPES = (ARROW_STREAM, PARQUET)
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ValueError("Columnar payloads need pyarrow installed on the server")
+
+
+def read_frame(body, content_type):
+    """Decode a request body into a DataFrame without copying it first"""
+    _require_pyarrow()
+    buffer = pa.py_buffer(body)
+
+    if content_type == ARROW_STREAM:
+        table = pa.ipc.open_stream(buffer).read_all()
+    elif content_type == PARQUET:
+        table = pq.read_table(pa.BufferReader(buffer))
+    else:
+        raise ValueError(f"Unsupported content type: {content_type}")
+
+    # split_blocks keeps numeric columns as views on the Arrow buffers
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
+
+def write_frame(df, content_type):
+    """Encode a DataFrame as an Arrow IPC stream or Parquet file"""
+    _require_pyarrow()
+    table = pa.Table.from_pandas(df, preserve_index=False)
+
+    if content_type == ARROW_STREAM:
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+    if content_type == PARQUET:
+        sink = io.BytesIO()
+        pq.write_table(table, sink)
+        return sink.getvalue()
+    raise ValueError(f"Unsupported content type: {content_type}")
+
+
+def negotiate(accept_mimetypes):
+    """Pick the response format from the Accept header, JSON unless a columnar type wins"""
+    if pa is None:
+        return "application/json"
+    return accept_mimetypes.best_match(
+        ["application/json", *COLUMNAR_TYPES], default="application/json"
+    )
@@ -0,0 +1,132 @@
+"""
+In-process cache for forecast results
+Bounded LRU with TTL eviction and single-flight deduplication of
+concurrent identical requests
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+class ForecastCache:
+    """
+    Maps a hashable key to a computed forecast.
+
+    Keys that are being computed by one request are awaited by any other
+    request asking for them, so identical concurrent requests do the work once.
+    """
+
+    def __init__(self, max_entries=1024, ttl_seconds=1800):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        self._entries = OrderedDict()  # key -> (expires_at, value), oldest first
+        self._inflight = {}  # key -> Future
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get_or_compute(self, key, compute):
+        """Return the cached value for key, or compute() and cache it"""
+        return self.get_or_compute_many([key], lambda keys: [compute()])[0]
+
+    def get_or_compute_many(self, keys, compute, keep=None):
+        """
+        Return values for all keys in order.
+        compute(missing_keys) must return one value per missing key; it is
+        called with only the keys nobody else has or is computing.
+        Values for which keep(value) is false are returned but not cached,
+        and are not shared either: a request that waited on another's
+        computation and got such a value (e.g. a forecast truncated by that
+        request's deadline) computes the key again itself, in a second call.
+        """
+        results = {}
+        owned = []
+        waiting = {}
+        now = time.monotonic()
+
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                entry = self._entries.get(key)
+                if entry is not None:
+                    if entry[0] > now:
+                        self._entries.move_to_end(key)
+                        results[key] = entry[1]
+                        self.hits += 1
+                        continue
+                    del self._entries[key]
+                    self.expirations += 1
+
+                if key in self._inflight:
+                    waiting[key] = self._inflight[key]
+                    self.coalesced += 1
+                else:
+                    self._inflight[key] = Future()
+                    owned.append(key)
+                    self.misses += 1
+
+        if owned:
+            try:
+                values = list(compute(owned))
+            except BaseException as e:
+                with self._lock:
+                    futures = [self._inflight.pop(key) for key in owned]
+                for future in futures:
+                    future.set_exception(e)
+                raise
+
+            with self._lock:
+                self._store(owned, values, keep)
+                futures = [self._inflight.pop(key) for key in owned]
+
+            for future, value in zip(futures, values):
+                future.set_result(value)
+            results.update(zip(owned, values))
+
+        retry = []
+        for key, future in waiting.items():
+            results[key] = future.result()
+            if keep is not None and not keep(results[key]):
+                retry.append(key)
+
+        if retry:
+            values = list(compute(retry))
+            with self._lock:
+                self._store(retry, values, keep)
+            results.update(zip(retry, values))
+
+        return [results[key] for key in keys]
+
+    def _store(self, keys, values, keep):
+        """Cache the values keep() accepts, evicting the oldest beyond max_entries; holds the lock"""
+        expires_at = time.monotonic() + self.ttl_seconds
+        for key, value in zip(keys, values):
+            if keep is not None and not keep(value):
+                continue
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self):
+        """Counters for sizing the cache"""
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+            }
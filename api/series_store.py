@@ -0,0 +1,152 @@
+"""
+Server-side store of recent observations per series
+Keeps the latest samples of each (server_id, service_description) in a
+fixed-size ring buffer so clients only send new samples instead of their
+whole history
+"""
+
+import threading
+import numpy as np
+import pandas as pd
+
+from features import encode
+
+
+class SeriesBuffer:
+    """Ring buffer of (timestamp, CPU_percent) samples for one series, oldest first"""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.timestamps = np.zeros(capacity, dtype="datetime64[ns]")
+        self.cpu = np.zeros(capacity, dtype=np.float32)
+        self.start = 0
+        self.count = 0
+
+    def ordered(self):
+        """Stored samples in chronological order"""
+        index = (self.start + np.arange(self.count)) % self.capacity
+        return self.timestamps[index], self.cpu[index]
+
+    def append(self, timestamps, cpu):
+        """
+        Append samples sorted by time; late or re-sent samples are merged into
+        place. A timestamp is stored once: a re-sent sample replaces the stored
+        one, so retrying an ingest doesn't change the series.
+        """
+        if self.count and timestamps[0] <= self.timestamps[(self.start + self.count - 1) % self.capacity]:
+            old_timestamps, old_cpu = self.ordered()
+            timestamps = np.concatenate([old_timestamps, timestamps])
+            cpu = np.concatenate([old_cpu, cpu])
+            order = np.argsort(timestamps, kind="stable")
+            timestamps, cpu = timestamps[order], cpu[order]
+            self.start = 0
+            self.count = 0
+
+        # Stable order puts the newest sample of a timestamp last: keep that one
+        newest = np.append(timestamps[1:] != timestamps[:-1], True)
+        timestamps, cpu = timestamps[newest], cpu[newest]
+
+        n = len(timestamps)
+        if n >= self.capacity:
+            self.timestamps[:] = timestamps[-self.capacity:]
+            self.cpu[:] = cpu[-self.capacity:]
+            self.start = 0
+            self.count = self.capacity
+            return
+
+        index = (self.start + self.count + np.arange(n)) % self.capacity
+        self.timestamps[index] = timestamps
+        self.cpu[index] = cpu
+        self.count += n
+        if self.count > self.capacity:
+            self.start = (self.start + self.count - self.capacity) % self.capacity
+            self.count = self.capacity
+
+    def latest(self):
+        """
+        Features of the last row preprocess_data would keep: the last sample
+        that has a CPU value, as do the three before it (lags never bridge
+        a missing value). Gap is the time since the sample before it.
+        """
+        timestamps, cpu = self.ordered()
+        valid = ~np.isnan(cpu)
+        complete = np.flatnonzero(valid[3:] & valid[2:-1] & valid[1:-2] & valid[:-3])
+        if len(complete) == 0:
+            raise ValueError(
+                "Not enough history for this server + service (need 4 consecutive samples with CPU_percent)"
+            )
+        i = complete[-1] + 3
+        return {
+            "Timestamp": pd.Timestamp(timestamps[i]),
+            "cpu_lag_1": float(cpu[i - 1]),
+            "cpu_lag_2": float(cpu[i - 2]),
+            "cpu_lag_3": float(cpu[i - 3]),
+            "time_gap_minutes": (timestamps[i] - timestamps[i - 1]) / np.timedelta64(1, "m"),
+        }
+
+
+class SeriesStore:
+    """Ring buffers for every (server_id, service_description code) seen by /ingest"""
+
+    def __init__(self, service_description_mapping, capacity=64):
+        self.service_description_mapping = service_description_mapping
+        self.capacity = capacity
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def ingest(self, df):
+        """
+        Append raw rows (server_id, service_description, Timestamp, CPU_percent).
+        Rows without a usable timestamp or a known series are skipped; a missing
+        CPU value is stored, so lags aren't taken across it.
+        Returns the number of rows stored.
+        """
+        services = encode(df["service_description"], self.service_description_mapping)
+
+        batch = pd.DataFrame({
+            "server_id": df["server_id"],
+            "service_description": services,
+            "Timestamp": pd.to_datetime(df["Timestamp"], errors="coerce"),
+            "CPU_percent": df["CPU_percent"],
+        }).dropna(subset=["server_id", "service_description", "Timestamp"])
+        if batch.empty:
+            return 0
+
+        batch = batch.sort_values(
+            ["server_id", "service_description", "Timestamp"], kind="stable"
+        )
+        server_ids = batch["server_id"].to_numpy(dtype=np.int64)
+        service_codes = batch["service_description"].to_numpy(dtype=np.int64)
+        timestamps = batch["Timestamp"].to_numpy(dtype="datetime64[ns]")
+        cpu = batch["CPU_percent"].to_numpy(dtype=np.float32)
+
+        # One slice per series
+        boundaries = np.flatnonzero(
+            (server_ids[1:] != server_ids[:-1]) | (service_codes[1:] != service_codes[:-1])
+        ) + 1
+        starts = np.concatenate([[0], boundaries])
+        ends = np.concatenate([boundaries, [len(batch)]])
+
+        with self._lock:
+            for start, end in zip(starts, ends):
+                key = (int(server_ids[start]), int(service_codes[start]))
+                buffer = self._series.get(key)
+                if buffer is None:
+                    buffer = self._series[key] = SeriesBuffer(self.capacity)
+                buffer.append(timestamps[start:end], cpu[start:end])
+
+        return len(batch)
+
+    def latest(self, server_id, service_description_str):
+        """Last-row features of one series"""
+        key = (int(server_id), self.service_description_mapping[service_description_str])
+        with self._lock:
+            buffer = self._series.get(key)
+            if buffer is None:
+                raise ValueError(
+                    f"No data found for server {server_id} + service {service_description_str}"
+                )
+            return buffer.latest()
+
+    def __len__(self):
+        return len(self._series)
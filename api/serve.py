@@ -0,0 +1,82 @@
+"""
+Production entry point for the forecasting API
+Runs server.py under gunicorn with several worker processes. The model is
+loaded once in the parent process and shared copy-on-write with the workers.
+
+Usage (from the api folder, like server.py):
+    python serve.py --workers 4 --port 5000
+"""
+
+import argparse
+import gc
+import os
+
+# One inference thread per worker: workers already use every core, and
+# OpenMP thread pools created before fork() are not safe in the children
+os.environ.setdefault("OMP_NUM_THREADS", "1")
+
+from gunicorn.app.base import BaseApplication
+
+
+def default_workers():
+    """One worker per core available to this process"""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+class ForecastServer(BaseApplication):
+    """gunicorn application that preloads server.py in the parent"""
+
+    def __init__(self, options):
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        import server
+
+        # The model and mappings live for the whole process; moving them out of
+        # the GC's reach keeps collections in the workers from touching (and
+        # un-sharing) their memory pages
+        gc.freeze()
+        return server.app
+
+
+def on_exit(arbiter):
+    print("Forecast server stopped")
+
+
+def post_fork(arbiter, worker):
+    print(f"Worker {worker.pid} started")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", type=str, default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=default_workers())
+    parser.add_argument("--timeout", type=int, default=60,
+                        help="Seconds before a stuck worker is restarted")
+    parser.add_argument("--graceful-timeout", type=int, default=30,
+                        help="Seconds workers get to finish requests on SIGTERM")
+    args = parser.parse_args()
+
+    # /forecast/batch fans out over a process pool in each worker; split the
+    # cores between workers instead of giving every worker a pool of all of them
+    os.environ.setdefault("BATCH_WORKERS", str(max(1, default_workers() // args.workers)))
+
+    print(f"Starting forecast server on {args.host}:{args.port} with {args.workers} workers")
+    ForecastServer({
+        "bind": f"{args.host}:{args.port}",
+        "workers": args.workers,
+        "worker_class": "sync",
+        "preload_app": True,
+        "timeout": args.timeout,
+        "graceful_timeout": args.graceful_timeout,
+        "post_fork": post_fork,
+        "on_exit": on_exit,
+    }).run()
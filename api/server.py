@@ -1,89 +1,42 @@
-from flask import Flask, request, jsonify
-import joblib
+import time
+started_at = time.perf_counter()
+
+from flask import Flask, Response, request, jsonify, stream_with_context
+import numpy as np
 import pandas as pd
+import os
+import sys
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
 
-service_description_mapping = {
-    "CPU_Usage": 1,
-    "Windows_CPU_Usage": 2,
-    "CPU_Usage_SQL": 3
-}
+# Shared forecasting code lives next to the Azure ML scoring script
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "azure_ml"))
+
+from forecast_engine import (
+    STEP_MINUTES, forecast_start, future_timestamps, iter_recursive_forecast,
+    make_predictor, recursive_forecast_many
+)
+from tree_ensemble import load_backend
+from features import SeriesIndex, build_features, service_description_mapping
+from feature_store import FeatureStore, open_feature_store
+from forecast_cache import ForecastCache
+from model_loader import StartupTimer, load_model, warm_up
+from series_store import SeriesStore
+from columnar import COLUMNAR_TYPES, negotiate, read_frame, write_frame
 
-season_mapping = {
-    "winter": 0,
-    "spring": 1,
-    "summer": 2,
-    "autumn": 3,
-    "Winter": 0,
-    "Spring": 1,
-    "Summer": 2,
-    "Autumn": 3
-}
+
+startup_timer = StartupTimer(started_at)
+startup_timer.mark("imports")
 
 
 def preprocess_data(df):
     """
     Preprocess raw data: encode categories, create lag features, calculate time gaps.
-    This matches the preprocessing done in ml5.ipynb.
+    This matches the preprocessing done in ml5.ipynb (see azure_ml/features.py).
     """
-    # 1. Drop unnecessary columns
-    df = df.drop(columns=["parallel_flag", "unique_services"], errors="ignore")
-    
-    # 2. Map service_description to integers (if it's text)
-    if df["service_description"].dtype == 'object':
-        df["service_description"] = df["service_description"].map(service_description_mapping)
-    
-    # 3. Convert Timestamp and set data types
-    if "Timestamp" in df.columns:
-        df["Timestamp"] = pd.to_datetime(df["Timestamp"], errors="coerce")
-    
-    df = df.astype({
-        "server_id": "int64",
-        "service_id": "int64",
-        "service_description": "int64",
-        "CPU_percent": "float32",
-        "hour": "int8",
-        "day_of_week": "int8",
-        "is_weekend": "int8",
-        "is_working_hour": "int8",
-    })
-    
-    # 4. Sort data (CRITICAL for time series)
-    df = df.sort_values(["server_id", "service_description", "Timestamp"])
-    
-    # 5. Calculate time_gap_minutes
-    df["time_gap_minutes"] = (
-        df.groupby(["server_id", "service_description"])["Timestamp"]
-          .diff()
-          .dt.total_seconds()
-          .div(60)
-    )
-    
-    # 6. Create lag features
-    df["cpu_lag_1"] = df.groupby("server_id")["CPU_percent"].shift(1)
-    df["cpu_lag_2"] = df.groupby("server_id")["CPU_percent"].shift(2)
-    df["cpu_lag_3"] = df.groupby("server_id")["CPU_percent"].shift(3)
-    
-    # 7. Drop rows with NaN values
-    df = df.dropna()
-    
-    # 8. Map season to integers (if it's text)
-    if df["season"].dtype == 'object':
-        df["season"] = df["season"].map(season_mapping)
-    
-    return df
-
-
-def get_season_from_date(ts):
-    month = ts.month
-    if month in [12, 1, 2]:
-        return "winter"
-    elif month in [3, 4, 5]:
-        return "spring"
-    elif month in [6, 7, 8]:
-        return "summer"
-    else:
-        return "autumn"
+    return build_features(df)
 
 
 def forecast_14_days(
@@ -91,138 +44,608 @@ def forecast_14_days(
     df,
     server_id,
     service_description_str,
-    steps=14 * 48
+    steps=14 * 48,
+    cache=None,
+    **options
 ):
-    # -------------------------------------------------
-    # 1. SORT DATA (CRITICAL)
-    # -------------------------------------------------
-    df = df.sort_values(
-        ["server_id", "service_description", "Timestamp"]
+    return forecast_14_days_many(
+        model,
+        df,
+        [(server_id, service_description_str)],
+        steps=steps,
+        cache=cache,
+        **options
     )
 
-    # -------------------------------------------------
-    # 2. FILTER SERVER + SERVICE
-    # -------------------------------------------------
-    df_srv = df[
-        (df["server_id"] == server_id) &
-        (df["service_description"] == service_description_mapping[service_description_str])
+
+def forecast_14_days_many(
+    model,
+    df,
+    targets,
+    steps=14 * 48,
+    cache=None,
+    **options
+):
+    """
+    Forecast several (server_id, service_description_str) pairs at once.
+    All series advance in lockstep, so the model is called once per step
+    no matter how many series are in the batch.
+
+    With a ForecastCache, series whose (server, service, lags, anchor slot)
+    were already forecast are served from it and only the rest are computed.
+    """
+    lags = lags_from_df(df, targets)
+    return forecast_from_lags(model, targets, lags, steps=steps, cache=cache, **options)
+
+
+def forecast_from_store(
+    model,
+    store,
+    targets,
+    steps=14 * 48,
+    cache=None,
+    **options
+):
+    """Forecast series whose history was sent earlier through /ingest"""
+    lags = lags_from_store(store, targets)
+    return forecast_from_lags(model, targets, lags, steps=steps, cache=cache, **options)
+
+
+def lags_from_df(df, targets, errors=None):
+    """
+    (cpu_lag_1, cpu_lag_2, cpu_lag_3) of each target's last preprocessed row.
+    df is a preprocessed frame, a SeriesIndex over one or a FeatureStore; the
+    lookup uses the offset table instead of sorting and masking the frame per target.
+    With an `errors` dict, failing targets are recorded there by index
+    (their lags left as NaN) instead of failing the whole call.
+    """
+    index = df if isinstance(df, (SeriesIndex, FeatureStore)) else SeriesIndex(df)
+
+    lags = np.full((len(targets), 3), np.nan, dtype=np.float32)
+    keys = [
+        (server_id, service_description_mapping.get(service_description_str))
+        for server_id, service_description_str in targets
     ]
+    positions = index.last_positions(keys)
 
-    if df_srv.empty:
-        raise ValueError("No data found for this server + service")
+    for i, (server_id, service_description_str) in enumerate(targets):
+        try:
+            if service_description_str not in service_description_mapping:
+                raise ValueError(f"Unknown service_description_str: {service_description_str}")
+            if positions[i] < 0:
+                raise ValueError(
+                    f"No data found for server {server_id} + service {service_description_str}"
+                )
+        except ValueError as e:
+            if errors is None:
+                raise
+            errors[i] = str(e)
 
-    # -------------------------------------------------
-    # 3. TAKE LAST ROW (LAGS + GAP SOURCE)
-    # -------------------------------------------------
-    last = df_srv.iloc[-1].copy()
+    found = positions >= 0
+    for k in range(3):
+        lags[found, k] = index.column(f"cpu_lag_{k + 1}")[positions[found]]
+
+    return lags
+
+
+def lags_from_store(store, targets, errors=None):
+    """(cpu_lag_1, cpu_lag_2, cpu_lag_3) of each target's last ingested row"""
+    lags = np.full((len(targets), 3), np.nan, dtype=np.float32)
+
+    for i, (server_id, service_description_str) in enumerate(targets):
+        try:
+            if service_description_str not in service_description_mapping:
+                raise ValueError(f"Unknown service_description_str: {service_description_str}")
+
+            last = store.latest(server_id, service_description_str)
+            lags[i] = (last["cpu_lag_1"], last["cpu_lag_2"], last["cpu_lag_3"])
+        except ValueError as e:
+            if errors is None:
+                raise
+            errors[i] = str(e)
+
+    return lags
+
+
+def lags_from_history(targets, errors=None):
+    """
+    Lags for requests without a history frame: series sent through /ingest
+    come from the series store, the rest from the feature store (if any).
+    """
+    if feature_store is None:
+        return lags_from_store(series_store, targets, errors=errors)
+
+    missing = {}
+    lags = lags_from_store(series_store, targets, errors=missing)
+    if missing:
+        index = sorted(missing)
+        store_errors = {}
+        lags[index] = lags_from_df(
+            feature_store, [targets[i] for i in index], errors=store_errors
+        )
+        for j, message in store_errors.items():
+            if errors is None:
+                raise ValueError(message)
+            errors[index[j]] = message
+    return lags
+
+
+def forecast_partition(targets, lags, start, steps, step_minutes=STEP_MINUTES,
+                       deadline=None, model=None):
+    """
+    Forecast one slice of a batch in lockstep, returns predictions (N, steps),
+    or fewer steps if the deadline was hit.
+    In pool workers the model comes from init_batch_worker.
+    """
+    services = np.array(
+        [service_description_mapping[t[1]] for t in targets], dtype=np.int64
+    )
+    _, predictions = recursive_forecast_many(
+        make_predictor(model if model is not None else batch_model),
+        lags, services, start, steps,
+        step_minutes=step_minutes, deadline=deadline
+    )
+    return predictions
+
+
+def init_batch_worker(model):
+    """Process-pool initializer: keep the model for forecast_partition"""
+    global batch_model
+    batch_model = model
+
+
+def forecast_batch(
+    model,
+    targets,
+    lags,
+    errors,
+    steps=14 * 48,
+    pool=None,
+    partitions=1,
+    step_minutes=STEP_MINUTES,
+    start=None,
+    deadline=None
+):
+    """
+    Forecast every target without an entry in `errors`, split into
+    `partitions` lockstep slices run on `pool` (inline without one).
+    Returns (predictions by target index, errors by target index, timestamps).
+    Slices that hit the deadline return fewer steps than the timestamps.
+    A broken pool raises BrokenProcessPool instead of failing the targets.
+    """
+    current_ts = forecast_start(start, step_minutes)
+    valid = [i for i in range(len(targets)) if i not in errors]
+    slices = [s for s in np.array_split(valid, max(min(partitions, len(valid)), 1)) if len(s)]
+
+    jobs = []
+    for index in slices:
+        args = ([targets[i] for i in index], lags[index], current_ts, steps,
+                step_minutes, deadline)
+        if pool is not None and len(slices) > 1:
+            job = pool.submit(forecast_partition, *args)
+        else:
+            job = Future()
+            try:
+                job.set_result(forecast_partition(*args, model=model))
+            except Exception as e:
+                job.set_exception(e)
+        jobs.append((index, job))
+
+    predictions = {}
+    errors = dict(errors)
+    for index, job in jobs:
+        try:
+            result = job.result()
+        except BrokenProcessPool:
+            raise
+        except Exception as e:
+            # A failed slice only fails its own targets
+            for i in index:
+                errors[int(i)] = str(e)
+            continue
+        for row, i in enumerate(index):
+            predictions[int(i)] = result[row]
+
+    return predictions, errors, future_timestamps(current_ts, steps, step_minutes)
+
+
+def forecast_frame(targets, timestamps, predictions):
+    """Result table: one row per (target, step), targets one after another"""
+    predictions = np.asarray(predictions).reshape(len(targets), -1)
+    steps = predictions.shape[1]
+    timestamps = timestamps[:steps]
+    return pd.DataFrame({
+        "Timestamp": np.tile(timestamps, len(targets)),
+        "server_id": np.repeat([int(t[0]) for t in targets], steps),
+        "service_description": np.repeat(np.array([t[1] for t in targets], dtype=object), steps),
+        "predicted_CPU_percent": predictions.ravel().astype("float64")
+    })
+
+
+def stream_forecast(
+    model,
+    targets,
+    lags,
+    steps=14 * 48,
+    block_size=48,
+    step_minutes=STEP_MINUTES,
+    start=None,
+    deadline=None
+):
+    """
+    Yield the forecast as NDJSON, one block of steps at a time, while the
+    recursion advances. Rows come step by step with all targets per step.
+    The cache is not used: results are never materialized in full.
+    If the deadline cuts the horizon short, a last {"truncated": true, ...}
+    line says how many steps were computed.
+    """
+    services = np.array(
+        [service_description_mapping[t[1]] for t in targets], dtype=np.int64
+    )
+    current_ts = forecast_start(start, step_minutes)
+    done = 0
+
+    for timestamps, predictions in iter_recursive_forecast(
+        make_predictor(model), lags, services, current_ts, steps, block_size,
+        step_minutes=step_minutes, deadline=deadline
+    ):
+        done += len(timestamps)
+        lines = []
+        for j, ts in enumerate(timestamps):
+            for i, (server_id, service_description_str) in enumerate(targets):
+                lines.append(app.json.dumps({
+                    "Timestamp": ts,
+                    "server_id": int(server_id),
+                    "service_description": service_description_str,
+                    "predicted_CPU_percent": float(predictions[i, j])
+                }))
+        yield "\n".join(lines) + "\n"
+
+    if done < steps:
+        yield app.json.dumps({"truncated": True, "steps_computed": done, "steps_requested": steps}) + "\n"
+
+
+def forecast_from_lags(
+    model,
+    targets,
+    lags,
+    steps=14 * 48,
+    cache=None,
+    step_minutes=STEP_MINUTES,
+    start=None,
+    deadline=None
+):
+    """
+    Roll each target's last (cpu_lag_1, cpu_lag_2, cpu_lag_3) forward.
+    If the deadline is hit, every target gets the steps computed so far
+    (fewer rows than `steps`); truncated forecasts are neither cached nor
+    handed to identical requests waiting on this one.
+    """
+    services = np.array(
+        [service_description_mapping[t[1]] for t in targets], dtype=np.int64
+    )
 
     # -------------------------------------------------
-    # 4. FORCE DATA TYPES (IMPORTANT)
+    # 4. START FROM CURRENT SLOT (OR REQUESTED START)
     # -------------------------------------------------
-    last["cpu_lag_1"] = float(last["cpu_lag_1"])
-    last["cpu_lag_2"] = float(last["cpu_lag_2"])
-    last["cpu_lag_3"] = float(last["cpu_lag_3"])
-    last["time_gap_minutes"] = float(last["time_gap_minutes"])
+    current_ts = forecast_start(start, step_minutes)
 
     # -------------------------------------------------
-    # 5. START FROM CURRENT COMPUTER TIME
+    # 5. ROLL LAGS FORWARD (calendar features precomputed)
     # -------------------------------------------------
-    current_ts = pd.Timestamp.now().floor("min")
-
-    future_rows = []
+    keys = [
+        (int(server_id), service_description_str, *lags[i].tolist(),
+         current_ts, steps, step_minutes)
+        for i, (server_id, service_description_str) in enumerate(targets)
+    ]
+    rows = {key: i for i, key in enumerate(keys)}
+
+    def compute(missing_keys):
+        index = [rows[key] for key in missing_keys]
+        _, predictions = recursive_forecast_many(
+            make_predictor(model),
+            lags[index],
+            services[index],
+            current_ts,
+            steps,
+            step_minutes=step_minutes,
+            deadline=deadline
+        )
+        return list(predictions)
 
-    for _ in range(steps):
+    if cache is None:
+        predictions = compute(keys)
+    else:
+        predictions = cache.get_or_compute_many(
+            keys, compute, keep=lambda p: len(p) == steps
+        )
 
-        # -------- calendar features --------
-        hour = int(current_ts.hour)
-        day_of_week = int(current_ts.dayofweek)
-        is_weekend = int(day_of_week >= 5)
-        is_working_hour = int(8 <= hour <= 18 and not is_weekend)
+    # Cached series are complete; cut everything to the shortest (truncated) horizon
+    done = min(len(p) for p in predictions) if predictions else 0
+    predictions = np.vstack([p[:done] for p in predictions]) if predictions else np.empty((0, 0))
 
-        season_str = get_season_from_date(current_ts)
-        season = int(season_mapping[season_str])
+    timestamps = future_timestamps(current_ts, steps, step_minutes)
 
-        # -------- model input --------
-        X_next = pd.DataFrame([{
-            "cpu_lag_1": last["cpu_lag_1"],
-            "cpu_lag_2": last["cpu_lag_2"],
-            "cpu_lag_3": last["cpu_lag_3"],
-            "time_gap_minutes": 30.0,  # FORCED
-            "hour": hour,
-            "day_of_week": day_of_week,
-            "is_weekend": is_weekend,
-            "is_working_hour": is_working_hour,
-            "season": season,
-            "service_description": service_description_mapping[service_description_str],
-        }])
+    return forecast_frame(targets, timestamps, predictions)
 
-        # -------- prediction --------
-        pred_cpu = float(model.predict(X_next)[0])
+# Your mappings and helper functions here (service_description_mapping, forecast_14_days)
 
-        future_rows.append({
-            "Timestamp": current_ts,
-            "server_id": server_id,
-            "service_description": service_description_str,
-            "predicted_CPU_percent": pred_cpu
-        })
 
-        # -------- update lags --------
-        last["cpu_lag_3"] = last["cpu_lag_2"]
-        last["cpu_lag_2"] = last["cpu_lag_1"]
-        last["cpu_lag_1"] = pred_cpu
 
-        # -------- advance time --------
-        current_ts += pd.Timedelta(minutes=30)
 
-    return pd.DataFrame(future_rows)
 
-# Your mappings and helper functions here (service_description_mapping, season_mapping, get_season_from_date, forecast_14_days)
 
+# Forecasts are anchored to the 30-minute grid, so repeated requests within a slot hit the cache
+forecast_cache = ForecastCache(
+    max_entries=int(os.getenv("FORECAST_CACHE_SIZE", "1024")),
+    ttl_seconds=float(os.getenv("FORECAST_CACHE_TTL", "1800"))
+)
 
+# Latest samples per series, fed incrementally through /ingest
+series_store = SeriesStore(
+    service_description_mapping,
+    capacity=int(os.getenv("SERIES_STORE_CAPACITY", "64"))
+)
 
+# Prepared features of every known series, memory-mapped next to the model
+# (written by prepare_data.py --feature_store); None if there is none.
+# Opened once: restart the server to pick up a rewritten store
+feature_store = open_feature_store(os.getenv("FEATURE_STORE_DIR", "../feature_store"))
 
+# /forecast/batch fans series out over this many processes (1 = inline);
+# serve.py lowers the default to cores / gunicorn workers
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", str(os.cpu_count() or 1)))
+batch_pool = None
 
+# Optional server-wide deadline for requests that don't send deadline_ms
+DEFAULT_DEADLINE_MS = os.getenv("FORECAST_DEADLINE_MS")
 
-# Load model
-model = joblib.load("../xgboost_cpu_forecaster.pkl")
+# Load model (native XGBoost format if published next to the pickle) and warm it up
+# INFERENCE_BACKEND=native swaps XGBoost for the array-backed tree evaluator
+startup_timer.mark("setup")
+model = load_backend(
+    load_model(".."),
+    os.getenv("INFERENCE_BACKEND", "xgboost")
+)
+startup_timer.mark("model load")
+warm_up(make_predictor(model))
+startup_timer.mark("warm-up")
+startup_timer.report()
 
 
 
 app = Flask(__name__)
 
+NDJSON = "application/x-ndjson"
+
+
+def read_request():
+    """
+    Request parameters plus the history frame under "df".
+    JSON bodies carry everything; Arrow/Parquet bodies carry only the frame,
+    with the targets in the query string (server_id / service_description_str,
+    repeated for several series), returned as a "targets" list.
+    """
+    if request.mimetype in COLUMNAR_TYPES:
+        data = {"df": read_frame(request.get_data(), request.mimetype)}
+        server_ids = request.args.getlist("server_id")
+        services = request.args.getlist("service_description_str")
+        for name in ("horizon_steps", "step_minutes", "start", "deadline_ms"):
+            if name in request.args:
+                data[name] = request.args[name]
+        if len(server_ids) != len(services):
+            raise ValueError(
+                f"{len(server_ids)} server_id but {len(services)} service_description_str in the query string"
+            )
+        if len(server_ids) == 1:
+            data["server_id"] = server_ids[0]
+            data["service_description_str"] = services[0]
+        if server_ids:
+            data["targets"] = [
+                {"server_id": server_id, "service_description_str": service}
+                for server_id, service in zip(server_ids, services)
+            ]
+        return data
+
+    data = request.get_json()
+    if "df" in data:
+        data["df"] = pd.DataFrame(data["df"])
+    return data
+
+
+def forecast_options(data, received_at):
+    """
+    Horizon (horizon_steps), resolution (step_minutes), first timestamp
+    (start) and deadline (deadline_ms after the request arrived) asked for
+    by the client, as keyword arguments for the forecast functions.
+    """
+    steps = int(data.get("horizon_steps", 14 * 48))
+    step_minutes = int(data.get("step_minutes", STEP_MINUTES))
+    if steps < 1 or step_minutes < 1:
+        raise ValueError("horizon_steps and step_minutes must be positive")
+
+    deadline_ms = data.get("deadline_ms", DEFAULT_DEADLINE_MS)
+    return {
+        "steps": steps,
+        "step_minutes": step_minutes,
+        "start": data.get("start"),
+        "deadline": received_at + float(deadline_ms) / 1000 if deadline_ms is not None else None,
+    }
+
+
+def write_response(result):
+    """Serialize a result frame in the format picked from the Accept header"""
+    mimetype = negotiate(request.accept_mimetypes)
+    if mimetype in COLUMNAR_TYPES:
+        return Response(write_frame(result, mimetype), mimetype=mimetype)
+    return jsonify(result.to_dict(orient="records"))
+
+
 @app.route("/forecast", methods=["POST"])
 def forecast():
+    received_at = time.monotonic()
+    data = {}
     try:
-        data = request.get_json()
+        data = read_request()
         print(f"Received request for server_id: {data.get('server_id')}")
         
-        df = pd.DataFrame(data["df"])
-        print(f"DataFrame shape before preprocessing: {df.shape}")
-        print(f"Columns before preprocessing: {list(df.columns)}")
-        
-        # Preprocess the raw data
-        df = preprocess_data(df)
-        print(f"DataFrame shape after preprocessing: {df.shape}")
-        print(f"Columns after preprocessing: {list(df.columns)}")
-        
-        server_id = int(data["server_id"])
-        service_description_str = data["service_description_str"]
-
-        result = forecast_14_days(
+        if "targets" in data:
+            # Several series in one request: forecast them in lockstep
+            targets = [
+                (int(t["server_id"]), t["service_description_str"])
+                for t in data["targets"]
+            ]
+        else:
+            targets = [(int(data["server_id"]), data["service_description_str"])]
+
+        options = forecast_options(data, received_at)
+
+        if "df" in data:
+            df = data["df"]
+            print(f"DataFrame shape before preprocessing: {df.shape}")
+            print(f"Columns before preprocessing: {list(df.columns)}")
+
+            # Preprocess the raw data
+            df = preprocess_data(df)
+            print(f"DataFrame shape after preprocessing: {df.shape}")
+            print(f"Columns after preprocessing: {list(df.columns)}")
+
+            lags = lags_from_df(df, targets)
+        else:
+            # No history in the request: use what was sent through /ingest,
+            # or the feature store for series never ingested
+            lags = lags_from_history(targets)
+
+        if request.accept_mimetypes.best_match(["application/json", NDJSON]) == NDJSON:
+            # Stream rows as they are computed instead of building the whole result
+            print(f"Streaming forecast for {len(targets)} series")
+            return Response(
+                stream_with_context(stream_forecast(model, targets, lags, **options)),
+                mimetype=NDJSON
+            )
+
+        result = forecast_from_lags(
             model=model,
-            df=df,
-            server_id=server_id,
-            service_description_str=service_description_str
+            targets=targets,
+            lags=lags,
+            cache=forecast_cache,
+            **options
         )
 
+        # A deadline may have cut the horizon short; say so without changing the body format
+        steps_computed = len(result) // len(targets)
         print(f"Forecast generated: {len(result)} predictions")
-        return jsonify(result.to_dict(orient="records"))
+        response = write_response(result)
+        response.headers["X-Forecast-Steps"] = str(steps_computed)
+        response.headers["X-Forecast-Truncated"] = str(steps_computed < options["steps"]).lower()
+        return response
     except Exception as e:
         print(f"Error occurred: {str(e)}")
         import traceback
         traceback.print_exc()
         return jsonify({"error": str(e), "server_id": data.get("server_id", "unknown")}), 500
 
+
+def get_batch_pool():
+    """Process pool for /forecast/batch, started on first use"""
+    global batch_pool
+    if batch_pool is None:
+        batch_pool = ProcessPoolExecutor(
+            max_workers=BATCH_WORKERS,
+            initializer=init_batch_worker,
+            initargs=(model,)
+        )
+    return batch_pool
+
+
+def reset_batch_pool():
+    """Drop a broken batch pool; get_batch_pool starts a new one"""
+    global batch_pool
+    if batch_pool is not None:
+        batch_pool.shutdown(wait=False, cancel_futures=True)
+        batch_pool = None
+
+
+@app.route("/forecast/batch", methods=["POST"])
+def forecast_batch_endpoint():
+    """
+    Forecast many targets against one shared history frame.
+    Results are keyed "server_id/service_description_str"; a target that
+    fails gets {"error": ...} without failing the rest of the batch.
+    """
+    received_at = time.monotonic()
+    data = {}
+    try:
+        data = read_request()
+        targets = [
+            (int(t["server_id"]), t["service_description_str"])
+            for t in data["targets"]
+        ]
+        print(f"Received batch request for {len(targets)} targets")
+        options = forecast_options(data, received_at)
+
+        errors = {}
+        if "df" in data:
+            # Preprocess once for every target
+            df = preprocess_data(data["df"])
+            lags = lags_from_df(df, targets, errors=errors)
+        else:
+            lags = lags_from_history(targets, errors=errors)
+
+        predictions, errors, timestamps = forecast_batch(
+            model,
+            targets,
+            lags,
+            errors,
+            pool=get_batch_pool() if BATCH_WORKERS > 1 else None,
+            partitions=BATCH_WORKERS,
+            **options
+        )
+
+        results = {}
+        for i, target in enumerate(targets):
+            key = f"{target[0]}/{target[1]}"
+            if i in errors:
+                results[key] = {"error": errors[i]}
+            else:
+                result = forecast_frame([target], timestamps, predictions[i])
+                results[key] = result.to_dict(orient="records")
+
+        print(f"Batch forecast generated: {len(predictions)} ok, {len(errors)} failed")
+        truncated = any(len(p) < options["steps"] for p in predictions.values())
+        return jsonify({"results": results, "failed": len(errors), "truncated": truncated})
+    except BrokenProcessPool as e:
+        # A pool worker died (e.g. OOM-killed); the pool can't take more work
+        print(f"Batch pool broken, starting a new one on the next request: {e}")
+        reset_batch_pool()
+        return jsonify({"error": str(e)}), 500
+    except Exception as e:
+        print(f"Error occurred: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/ingest", methods=["POST"])
+def ingest():
+    try:
+        df = read_request()["df"]
+
+        ingested = series_store.ingest(df)
+
+        print(f"Ingested {ingested} samples ({len(series_store)} series stored)")
+        return jsonify({"ingested": ingested, "series": len(series_store)})
+    except Exception as e:
+        print(f"Error occurred: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/cache/stats", methods=["GET"])
+def cache_stats():
+    return jsonify(forecast_cache.stats())
+
     
 if __name__ == "__main__":
     app.run(port=5000)
@@ -0,0 +1,112 @@
+"""
+Load driver for the scoring endpoint
+Sends the same request from `concurrency` clients at once and reports
+latency percentiles and requests per second. Works against local_endpoint.py
+or a deployed endpoint (its scoring URI and key).
+
+Usage:
+    python benchmark_endpoint.py --url http://127.0.0.1:5001/score --key local-key \
+        --concurrency 1 4 16 --requests 500 --rows 1
+    python benchmark_endpoint.py --url ... --horizon_steps 672 --data ../data/data.csv
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import requests
+
+from tree_ensemble import sample_features
+
+
+def rows_payload(rows):
+    """Row-scoring request with synthetic feature rows"""
+    return {"data": sample_features(rows).to_dict(orient="records")}
+
+
+def horizon_payload(data_file, server_id, service, steps):
+    """Horizon-mode request with one server's raw history"""
+    df = pd.read_csv(data_file, usecols=["server_id", "Timestamp", "service_description", "CPU_percent"])
+    df = df[df["server_id"] == server_id].dropna()
+    return {
+        "df": df.to_dict(orient="records"),
+        "server_id": server_id,
+        "service_description_str": service,
+        "horizon_steps": steps
+    }
+
+
+def run_load(url, body, headers, requests_total, concurrency):
+    """
+    requests_total POSTs from `concurrency` clients, each on its own
+    keep-alive session. Returns (latencies in seconds, errors, wall seconds).
+    """
+    latencies = []
+    errors = []
+    remaining = [requests_total]
+    lock = threading.Lock()
+
+    def client():
+        with requests.Session() as session:
+            while True:
+                with lock:
+                    if remaining[0] == 0:
+                        return
+                    remaining[0] -= 1
+                start = time.perf_counter()
+                response = session.post(url, data=body, headers=headers)
+                elapsed = time.perf_counter() - start
+                failed = response.status_code != 200 or '"error"' in response.text
+                with lock:
+                    latencies.append(elapsed)
+                    if failed:
+                        errors.append(f"{response.status_code}: {response.text[:200]}")
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return np.array(latencies), errors, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", type=str, default="http://127.0.0.1:5001/score")
+    parser.add_argument("--key", type=str, default=os.getenv("ENDPOINT_KEY"))
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=500, help="Requests per concurrency level")
+    parser.add_argument("--rows", type=int, default=1, help="Feature rows per row-scoring request")
+    parser.add_argument("--horizon_steps", type=int, default=0,
+                        help="Send horizon-mode requests of this many steps instead")
+    parser.add_argument("--data", type=str, default=os.path.join("..", "data", "data.csv"))
+    parser.add_argument("--server_id", type=int, default=638939)
+    parser.add_argument("--service", type=str, default="CPU_Usage")
+    args = parser.parse_args()
+
+    if args.horizon_steps > 0:
+        payload = horizon_payload(args.data, args.server_id, args.service, args.horizon_steps)
+    else:
+        payload = rows_payload(args.rows)
+    body = json.dumps(payload)
+
+    headers = {"Content-Type": "application/json"}
+    if args.key:
+        headers["Authorization"] = f"Bearer {args.key}"
+
+    # Warm up connections and the model
+    run_load(args.url, body, headers, max(args.concurrency), max(args.concurrency))
+
+    print(f"{'clients':>8} {'req/s':>10} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for concurrency in args.concurrency:
+        latencies, errors, seconds = run_load(args.url, body, headers, args.requests, concurrency)
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+        print(f"{concurrency:>8} {len(latencies) / seconds:>10.1f} "
+              f"{p50:>8.2f} {p95:>8.2f} {p99:>8.2f} {len(errors):>7}")
+        if errors:
+            print(f"  first error: {errors[0]}")
@@ -0,0 +1,106 @@
+"""
+Benchmark for the shared feature builder
+Compares build_features against the original step-by-step pandas
+preprocessing on a synthetic raw frame: wall time, peak memory, equality.
+
+Usage:
+    python benchmark_features.py --rows 2000000 --servers 2000
+"""
+
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from features import build_features, season_mapping, service_description_mapping
+
+
+def legacy_prepare(df):
+    """The preprocessing prepare_data and preprocess_data used before build_features"""
+    df = df.drop(columns=["parallel_flag", "unique_services"], errors="ignore")
+    if df["service_description"].dtype == 'object':
+        df["service_description"] = df["service_description"].map(service_description_mapping)
+    df["Timestamp"] = pd.to_datetime(df["Timestamp"], errors="coerce")
+    df = df.astype({
+        "server_id": "int64",
+        "service_id": "int64",
+        "service_description": "int64",
+        "CPU_percent": "float32",
+        "hour": "int8",
+        "day_of_week": "int8",
+        "is_weekend": "int8",
+        "is_working_hour": "int8",
+    })
+    df = df.sort_values(["server_id", "service_description", "Timestamp"])
+    df["time_gap_minutes"] = (
+        df.groupby(["server_id", "service_description"])["Timestamp"]
+          .diff()
+          .dt.total_seconds()
+          .div(60)
+    )
+    df["cpu_lag_1"] = df.groupby("server_id")["CPU_percent"].shift(1)
+    df["cpu_lag_2"] = df.groupby("server_id")["CPU_percent"].shift(2)
+    df["cpu_lag_3"] = df.groupby("server_id")["CPU_percent"].shift(3)
+    df = df.dropna()
+    if df["season"].dtype == 'object':
+        df["season"] = df["season"].map(season_mapping)
+    return df
+
+
+def synthetic_raw(rows, servers, seed=0):
+    """Raw telemetry shaped like data.csv, in shuffled order"""
+    rng = np.random.default_rng(seed)
+    timestamps = pd.Timestamp("2025-01-01") + pd.to_timedelta(
+        rng.integers(0, 365 * 48, rows) * 30, unit="min"
+    )
+    day_of_week = timestamps.dayofweek
+    seasons = np.array(["Winter", "Spring", "Summer", "Autumn"], dtype=object)
+    return pd.DataFrame({
+        "server_id": rng.integers(100000, 100000 + servers, rows),
+        "Timestamp": timestamps.strftime("%Y-%m-%d %H:%M:%S"),
+        "service_id": rng.integers(1, 50, rows),
+        "service_description": rng.choice(list(service_description_mapping), rows),
+        "CPU_percent": rng.uniform(0, 100, rows).round(2),
+        "hour": timestamps.hour,
+        "day_of_week": day_of_week,
+        "is_weekend": (day_of_week >= 5).astype(int),
+        "is_working_hour": rng.integers(0, 2, rows),
+        "season": seasons[(timestamps.month.to_numpy() % 12) // 3],
+        "parallel_flag": 0,
+        "unique_services": 1,
+    })
+
+
+def measure(func, df):
+    """(result, seconds, peak MiB allocated while running func)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(df)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / 2 ** 20
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--servers", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"Generating {args.rows} raw rows for {args.servers} servers...")
+    raw = synthetic_raw(args.rows, args.servers)
+
+    expected, legacy_time, legacy_peak = measure(legacy_prepare, raw)
+    actual, new_time, new_peak = measure(build_features, raw)
+
+    # Same values; build_features returns them in compact dtypes
+    pd.testing.assert_frame_equal(expected.astype(actual.dtypes.to_dict()), actual, check_exact=True)
+
+    print(f"{'':>16} {'seconds':>10} {'peak MiB':>10}")
+    print(f"{'legacy pandas':>16} {legacy_time:>10.2f} {legacy_peak:>10.0f}")
+    print(f"{'build_features':>16} {new_time:>10.2f} {new_peak:>10.0f}")
+    print(f"Identical output ({len(actual)} rows): "
+          f"{legacy_time / new_time:.1f}x faster, {legacy_peak / new_peak:.1f}x less peak memory")
@@ -0,0 +1,61 @@
+"""
+Benchmark for the raw CSV loader
+Writes a synthetic raw export, then compares pd.read_csv + pd.to_datetime
+(the previous path) against load_raw: wall time, resulting memory and
+whether build_features produces the same output from both.
+
+Usage:
+    python benchmark_loader.py --rows 2000000 --servers 2000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmark_features import synthetic_raw
+from features import build_features
+from raw_loader import load_raw
+
+
+def legacy_load(path):
+    df = pd.read_csv(path)
+    df["Timestamp"] = pd.to_datetime(df["Timestamp"], errors="coerce")
+    return df
+
+
+def timed(func, path, repeat=3):
+    """Best of `repeat` runs"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(path)
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--servers", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "raw.csv")
+        print(f"Writing {args.rows} raw rows for {args.servers} servers...")
+        synthetic_raw(args.rows, args.servers).to_csv(path, index=False)
+
+        legacy, legacy_time = timed(legacy_load, path)
+        loaded, new_time = timed(load_raw, path)
+
+    pd.testing.assert_frame_equal(build_features(legacy), build_features(loaded), check_exact=True)
+
+    def mib(df):
+        return df.memory_usage(deep=True).sum() / 2 ** 20
+
+    print(f"{'':>28} {'seconds':>10} {'frame MiB':>10}")
+    print(f"{'read_csv + to_datetime':>28} {legacy_time:>10.2f} {mib(legacy):>10.0f}")
+    print(f"{'load_raw':>28} {new_time:>10.2f} {mib(loaded):>10.0f}")
+    print(f"Same features from both; load_raw is {legacy_time / new_time:.1f}x faster")
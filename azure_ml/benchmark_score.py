@@ -0,0 +1,104 @@
+"""
+Microbenchmark for score.run
+Compares the previous request path (json.loads -> DataFrame -> column
+selection -> model.predict -> tolist -> json.dumps) against the current
+run() for small payloads, and checks both return the same predictions.
+With --threads, also measures run() throughput from concurrent callers
+with and without micro-batching.
+
+Usage:
+    python benchmark_score.py --model_dir .. --rows 1 10 100 --threads 1 4 16
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from forecast_engine import FEATURES
+from tree_ensemble import sample_features
+
+
+def legacy_run(raw_data):
+    data = json.loads(raw_data)
+    df = pd.DataFrame(data["data"])
+    predictions = score.model.predict(df[FEATURES])
+    return json.dumps({
+        "predictions": predictions.tolist(),
+        "input_count": len(df),
+        "timestamp": datetime.utcnow().isoformat()
+    })
+
+
+def timed(func, raw_data, seconds=1.0):
+    """Mean microseconds per call over about `seconds` of calls"""
+    func(raw_data)
+    calls = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        func(raw_data)
+        calls += 1
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def throughput(raw_data, threads, seconds=1.0):
+    """run() calls per second from `threads` threads calling in a loop"""
+    calls = [0] * threads
+    stop = time.perf_counter() + seconds
+
+    def worker(i):
+        while time.perf_counter() < stop:
+            score.run(raw_data)
+            calls[i] += 1
+
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return sum(calls) / seconds
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model_dir", type=str, default=os.getenv("AZUREML_MODEL_DIR", ".."),
+                        help="Folder with xgboost_cpu_forecaster.pkl")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--threads", type=int, nargs="*", default=[],
+                        help="Concurrent callers for the throughput comparison")
+    parser.add_argument("--seconds", type=float, default=1.0, help="Time spent per measurement")
+    args = parser.parse_args()
+
+    os.environ["AZUREML_MODEL_DIR"] = args.model_dir
+    import score
+    score.init()
+
+    print(f"{'rows':>6} {'legacy us':>10} {'run us':>10} {'speedup':>8}")
+    for rows in args.rows:
+        raw_data = json.dumps({"data": sample_features(rows).to_dict(orient="records")})
+
+        expected = json.loads(legacy_run(raw_data))["predictions"]
+        actual = json.loads(score.run(raw_data))["predictions"]
+        if actual != expected:
+            raise ValueError(f"run() predictions differ from the previous path for {rows} rows")
+
+        legacy_time = timed(legacy_run, raw_data, args.seconds)
+        new_time = timed(score.run, raw_data, args.seconds)
+        print(f"{rows:>6} {legacy_time:>10.0f} {new_time:>10.0f} {legacy_time / new_time:>7.1f}x")
+
+    if args.threads and score.batcher is not None:
+        raw_data = json.dumps({"data": sample_features(1).to_dict(orient="records")})
+        batched, direct = score.predict, score.make_predictor(score.model)
+
+        print(f"\n{'threads':>7} {'direct req/s':>13} {'batched req/s':>14}")
+        for threads in args.threads:
+            score.predict = direct
+            direct_rate = throughput(raw_data, threads, args.seconds)
+            score.predict = batched
+            batched_rate = throughput(raw_data, threads, args.seconds)
+            print(f"{threads:>7} {direct_rate:>13.0f} {batched_rate:>14.0f}")
+        print(f"Micro-batching: {score.batcher.stats()}")
@@ -0,0 +1,72 @@
+"""
+Benchmark for the prepared-data file format
+Writes the same prepared frame as CSV and as the partitioned Parquet
+dataset, then compares write time, read time and size on disk.
+
+Usage:
+    python benchmark_storage.py --rows 2000000 --servers 2000
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmark_features import synthetic_raw
+from features import build_features
+from prepared_dataset import read_prepared, write_prepared
+
+
+def size_on_disk(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(root, name))
+               for root, _, names in os.walk(path) for name in names)
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--servers", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"Preparing {args.rows} synthetic rows for {args.servers} servers...")
+    df = build_features(synthetic_raw(args.rows, args.servers)).reset_index(drop=True)
+    server_id = int(df["server_id"].iloc[0])
+    columns = ["cpu_lag_1", "cpu_lag_2", "cpu_lag_3", "time_gap_minutes", "hour"]
+
+    tmp_dir = tempfile.mkdtemp(prefix="storage_bench_")
+    try:
+        csv_path = os.path.join(tmp_dir, "prepared.csv")
+        parquet_path = os.path.join(tmp_dir, "prepared")
+
+        _, csv_write = timed(df.to_csv, csv_path, index=False)
+        _, csv_read = timed(pd.read_csv, csv_path)
+        _, csv_cols = timed(pd.read_csv, csv_path, usecols=columns)
+        _, csv_server = timed(lambda: pd.read_csv(csv_path).query("server_id == @server_id"))
+
+        _, pq_write = timed(write_prepared, df, parquet_path)
+        back, pq_read = timed(read_prepared, parquet_path)
+        _, pq_cols = timed(read_prepared, parquet_path, columns=columns)
+        _, pq_server = timed(read_prepared, parquet_path, server_ids=[server_id])
+
+        assert (back.dtypes == df.dtypes).all(), "dtypes not preserved"
+
+        print(f"{'':>24} {'CSV':>10} {'Parquet':>10}")
+        print(f"{'size on disk (MiB)':>24} {size_on_disk(csv_path) / 2**20:>10.1f} "
+              f"{size_on_disk(parquet_path) / 2**20:>10.1f}")
+        print(f"{'write (s)':>24} {csv_write:>10.2f} {pq_write:>10.2f}")
+        print(f"{'read all (s)':>24} {csv_read:>10.2f} {pq_read:>10.2f}")
+        print(f"{'read 5 columns (s)':>24} {csv_cols:>10.2f} {pq_cols:>10.2f}")
+        print(f"{'read one server (s)':>24} {csv_server:>10.2f} {pq_server:>10.2f}")
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
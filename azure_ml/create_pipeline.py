@@ -63,12 +63,16 @@ def create_pipeline():
         """Pipeline for CPU forecasting model"""
         
         # Step 1: Data Preparation
+        # train_model.py and evaluate_model.py read prepared_data as one CSV
+        # file, so keep that format until they read the Parquet dataset
         print("Defining data preparation step...")
         prepare_step = dsl.command(
             command="""
             python prepare_data.py \
                 --input_data ${{inputs.raw_data}} \
-                --output_data ${{outputs.prepared_data}}
+                --output_data ${{outputs.prepared_data}} \
+                --output_format csv \
+                --workers 4
             """,
             inputs={
                 "raw_data": Input(type=AssetTypes.URI_FILE, path="data.csv")
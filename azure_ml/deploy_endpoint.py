@@ -14,6 +14,11 @@ from azure_config import (
     ENDPOINT_NAME, LOCATION
 )
 
+# Requests in flight per instance. The inference server runs run() in
+# WORKER_COUNT separate worker processes, one request at a time each, so the
+# two are set together: one worker per vCPU of Standard_DS2_v2
+INSTANCE_WORKERS = 2
+
 
 def create_endpoint():
     """Create online endpoint for real-time predictions"""
@@ -70,9 +75,12 @@ def deploy_model():
         ),
         instance_type="Standard_DS2_v2",
         instance_count=1,
+        # score.py's micro-batching only merges run() calls that overlap in one
+        # process; with these single-request workers it passes rows straight through
+        environment_variables={"WORKER_COUNT": str(INSTANCE_WORKERS)},
         request_settings={
             "request_timeout_ms": 3000,
-            "max_concurrent_requests_per_instance": 1,
+            "max_concurrent_requests_per_instance": INSTANCE_WORKERS,
         },
         liveness_probe={
             "failure_threshold": 30,
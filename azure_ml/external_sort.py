@@ -0,0 +1,123 @@
+"""
+External sort for raw telemetry that does not fit in memory
+Orders a raw CSV by (server_id, service_description, Timestamp) on disk:
+sorted runs of chunk_rows rows are written to Parquet, then k-way merged
+block by block into one sorted Parquet file.
+"""
+
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from features import normalize_raw
+
+ROW_COLUMN = "_row"  # position in the raw file, breaks ties so the sort is stable
+
+NAT_KEY = np.iinfo(np.int64).max
+
+
+def sort_keys(df):
+    """(server_id, service_description, Timestamp with NaT last, raw row) as int64 arrays"""
+    ts = df["Timestamp"].to_numpy(dtype="datetime64[ns]")
+    return [
+        df["server_id"].to_numpy(dtype=np.int64),
+        df["service_description"].to_numpy(dtype=np.int64),
+        np.where(np.isnat(ts), NAT_KEY, ts.view(np.int64)),
+        df[ROW_COLUMN].to_numpy(dtype=np.int64),
+    ]
+
+
+def sort_frame(df):
+    keys = sort_keys(df)
+    return df.iloc[np.lexsort(keys[::-1])]
+
+
+def count_not_after(keys, bound):
+    """Rows of sorted keys that are <= bound (lexicographic), i.e. a prefix length"""
+    not_after = np.ones(len(keys[0]), dtype=bool)
+    for column, value in zip(reversed(keys), reversed(bound)):
+        not_after = (column < value) | ((column == value) & not_after)
+    return int(not_after.sum())
+
+
+def write_runs(input_csv, tmp_dir, chunk_rows):
+    """Stage 1a: sort chunk_rows rows at a time, one Parquet run file per chunk"""
+    runs = []
+    schema = None
+    offset = 0
+    for chunk in pd.read_csv(input_csv, chunksize=chunk_rows):
+        chunk = normalize_raw(chunk)
+        chunk[ROW_COLUMN] = np.arange(offset, offset + len(chunk), dtype=np.int64)
+        offset += len(chunk)
+
+        table = pa.Table.from_pandas(sort_frame(chunk), schema=schema, preserve_index=False)
+        schema = table.schema
+        path = os.path.join(tmp_dir, f"run_{len(runs):05d}.parquet")
+        pq.write_table(table, path)
+        runs.append(path)
+    return runs, schema, offset
+
+
+def merge_runs(runs, block_rows):
+    """
+    Stage 1b: k-way merge of sorted runs, yielding sorted DataFrames.
+
+    Each run is read block_rows rows at a time. Every step emits the buffered
+    rows that are no greater than the smallest last-buffered key of a run that
+    still has unread rows, so nothing emitted can be preceded by a later read.
+    """
+    readers = [pq.ParquetFile(path).iter_batches(batch_size=block_rows) for path in runs]
+    buffers = [None] * len(runs)  # run -> (frame, keys) of unread rows
+    exhausted = [False] * len(runs)
+
+    while True:
+        for i, reader in enumerate(readers):
+            if not exhausted[i] and (buffers[i] is None or len(buffers[i][0]) == 0):
+                batch = next(reader, None)
+                if batch is None:
+                    exhausted[i] = True
+                    buffers[i] = None
+                else:
+                    frame = batch.to_pandas()
+                    buffers[i] = (frame, sort_keys(frame))
+
+        live = [i for i, buffer in enumerate(buffers) if buffer is not None and len(buffer[0])]
+        if not live:
+            return
+
+        # Smallest "last key read so far" among runs with more rows on disk
+        bounds = [tuple(k[-1] for k in buffers[i][1]) for i in live if not exhausted[i]]
+        bound = min(bounds) if bounds else None
+
+        parts = []
+        for i in live:
+            frame, keys = buffers[i]
+            n = len(frame) if bound is None else count_not_after(keys, bound)
+            if n:
+                parts.append(frame.iloc[:n])
+                buffers[i] = (frame.iloc[n:], [k[n:] for k in keys])
+        yield sort_frame(pd.concat(parts, ignore_index=True))
+
+
+def external_sort(input_csv, sorted_path, chunk_rows=1_000_000, tmp_dir=None):
+    """Sort a raw CSV into a Parquet file without holding more than ~chunk_rows rows"""
+    tmp_dir = tempfile.mkdtemp(prefix="sort_runs_", dir=tmp_dir)
+    try:
+        runs, schema, total = write_runs(input_csv, tmp_dir, chunk_rows)
+        print(f"Wrote {len(runs)} sorted runs ({total} rows)")
+        if not runs:
+            raise ValueError(f"No rows in {input_csv}")
+
+        # Each run keeps one block in memory during the merge
+        block_rows = max(1, chunk_rows // len(runs))
+        with pq.ParquetWriter(sorted_path, schema) as writer:
+            for frame in merge_runs(runs, block_rows):
+                writer.write_table(pa.Table.from_pandas(frame, schema=schema, preserve_index=False))
+        print(f"Sorted {total} rows into {sorted_path}")
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
@@ -0,0 +1,155 @@
+"""
+Memory-mapped feature store for serving
+Prepared features are kept as one .npy file per column, sorted by
+(server_id, service_description, Timestamp), with an offset index per series.
+The API maps every column file read-only when it opens the store at startup,
+so /forecast can read the tail of any known series without the client sending
+its history, and every worker process shares the same pages through the OS
+page cache. A running server keeps the store it opened: restart it to serve
+a rewritten one.
+
+Usage (writes the store next to the model):
+    python feature_store.py --prepared_data prepared_data --output ../feature_store
+"""
+
+import argparse
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+from features import SeriesIndex, series_bounds
+
+INDEX_FILE = "_index.npz"
+
+
+def column_path(path, name):
+    return os.path.join(path, f"{name}.npy")
+
+
+def write_feature_store(df, path):
+    """
+    Write a prepared frame (build_features output) as a feature store.
+    The store is built next to path and swapped in at the end. Readers map
+    every column when they open the store, and open mappings survive the old
+    files being deleted, so running processes keep reading the previous store.
+    """
+    df = SeriesIndex(df).df
+    server_id = df["server_id"].to_numpy()
+    service = df["service_description"].to_numpy()
+    starts, ends = series_bounds(server_id, service)
+
+    tmp_path = path.rstrip(os.sep) + ".tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    columns = []
+    for col in df.columns:
+        values = df[col].to_numpy()
+        if values.dtype == object:
+            # Only fixed-width columns can be mapped
+            continue
+        np.save(column_path(tmp_path, col), np.ascontiguousarray(values))
+        columns.append(col)
+    np.savez(
+        os.path.join(tmp_path, INDEX_FILE),
+        columns=np.array(columns, dtype=str),
+        rows=len(df),
+        server_id=server_id[starts],
+        service_description=service[starts],
+        start=starts,
+        end=ends,
+    )
+
+    if os.path.isdir(path) and os.listdir(path):
+        if not os.path.exists(os.path.join(path, INDEX_FILE)):
+            raise ValueError(f"{path} is not empty and is not a feature store")
+        shutil.rmtree(path)
+    os.rename(tmp_path, path)
+
+
+class FeatureStore:
+    """
+    Read side of a feature store, with the same lookups as SeriesIndex
+    (offsets, last_positions, column). The index is read and every column
+    file is mapped together when the store is opened, so the offsets always
+    match the mapped columns even if the store is rewritten later. Mapping
+    reads no data: pages are loaded (and shared) on access.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with np.load(os.path.join(path, INDEX_FILE)) as index:
+            self.columns = index["columns"].tolist()
+            rows = int(index["rows"])
+            keys = zip(index["server_id"].tolist(), index["service_description"].tolist())
+            self.offsets = dict(zip(keys, zip(index["start"].tolist(), index["end"].tolist())))
+        self._columns = {
+            name: np.load(column_path(path, name), mmap_mode="r") for name in self.columns
+        }
+        if any(len(values) != rows for values in self._columns.values()):
+            # The store was swapped between reading the index and mapping the columns
+            raise ValueError(f"Feature store at {path} changed while it was opened")
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __contains__(self, key):
+        return key in self.offsets
+
+    def column(self, name):
+        """One column as a read-only memory map"""
+        return self._columns[name]
+
+    def last_positions(self, keys):
+        """Row position of each series' latest row, -1 where the series is absent"""
+        return np.array([self.offsets.get(key, (0, 0))[1] - 1 for key in keys], dtype=np.int64)
+
+    def tail(self, server_id, service_description, n=1, columns=None):
+        """Last n rows of one series as a DataFrame (only those rows are read)"""
+        start, end = self.offsets[(server_id, service_description)]
+        start = max(start, end - n)
+        return pd.DataFrame(
+            {col: np.array(self.column(col)[start:end]) for col in columns or self.columns},
+            index=pd.RangeIndex(start, end)
+        )
+
+
+def open_feature_store(path, attempts=3):
+    """
+    FeatureStore at path, or None if nothing has been written there.
+    Retries when a concurrent write_feature_store swaps the store mid-open.
+    """
+    if not path:
+        return None
+    for attempt in range(attempts):
+        try:
+            return FeatureStore(path)
+        except (FileNotFoundError, ValueError):
+            # Nothing there, unless a write is between removing the old store
+            # and renaming the new one into place
+            writing = os.path.exists(path.rstrip(os.sep) + ".tmp")
+            if not writing and not os.path.exists(os.path.join(path, INDEX_FILE)):
+                return None
+            if attempt == attempts - 1:
+                raise
+            time.sleep(0.1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--prepared_data", type=str,
+                        help="prepare_data output: Parquet folder or CSV file")
+    parser.add_argument("--output", type=str, help="Feature store folder to (re)write")
+    args = parser.parse_args()
+
+    if os.path.isdir(args.prepared_data):
+        from prepared_dataset import read_prepared
+        df = read_prepared(args.prepared_data)
+    else:
+        df = pd.read_csv(args.prepared_data, parse_dates=["Timestamp"])
+    print(f"Loaded {len(df)} prepared rows")
+
+    write_feature_store(df, args.output)
+    print(f"Wrote feature store for {len(FeatureStore(args.output))} series to {args.output}")
@@ -0,0 +1,410 @@
+"""
+Feature engineering shared by the API server and the training pipeline
+Sorts once and derives time gaps and lag features from contiguous NumPy
+arrays in a single pass
+"""
+
+import numpy as np
+import pandas as pd
+
+
+service_description_mapping = {
+    "CPU_Usage": 1,
+    "Windows_CPU_Usage": 2,
+    "CPU_Usage_SQL": 3
+}
+
+season_mapping = {
+    "winter": 0, "spring": 1, "summer": 2, "autumn": 3,
+    "Winter": 0, "Spring": 1, "Summer": 2, "Autumn": 3
+}
+
+DROP_COLUMNS = ["parallel_flag", "unique_services"]
+
+# Compact output types: int32 ids, int8 codes and flags, float32 values
+DTYPES = {
+    "server_id": "int32",
+    "service_id": "int32",
+    "service_description": "int8",
+    "CPU_percent": "float32",
+    "hour": "int8",
+    "day_of_week": "int8",
+    "is_weekend": "int8",
+    "is_working_hour": "int8",
+}
+
+N_LAGS = 3
+
+# Derived from Timestamp when a client doesn't send them
+CALENDAR_COLUMNS = ["hour", "day_of_week", "is_weekend", "is_working_hour", "season"]
+
+# Season code per calendar month (index 1..12), same as season_mapping
+MONTH_TO_SEASON = np.array([-1, 0, 0, 1, 1, 1, 2, 2, 2, 3, 3, 3, 0], dtype=np.int8)
+
+SERIES_KEYS = ["server_id", "service_description", "Timestamp"]
+
+
+def encode(values, mapping):
+    """
+    Integer codes for a column of labels, NaN where a label is missing or
+    unknown. Object and categorical columns are looked up once per distinct
+    label; numeric columns are taken to be codes already.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes, labels = values.cat.codes.to_numpy(), values.cat.categories
+    elif values.dtype == "object":
+        codes, labels = pd.factorize(values)
+    else:
+        return values
+    # Code -1 (missing) picks the trailing NaN
+    lookup = np.array([mapping.get(label, np.nan) for label in labels] + [np.nan])
+    return pd.Series(lookup[codes], index=values.index)
+
+
+def int_keys(values, name):
+    """
+    A server_id or encoded service_description column as int64. Raises
+    ValueError on missing, unknown or non-finite entries instead of letting
+    NumPy cast them to garbage, like pandas astype("int64") does.
+    """
+    values = np.asarray(values)
+    if values.dtype.kind in "iu":
+        return values.astype(np.int64, copy=False)
+    if values.dtype.kind == "f":
+        if not np.isfinite(values).all():
+            raise ValueError(f"{name} has missing or unknown values; cannot convert to integer")
+        return values.astype(np.int64)
+    return pd.Series(values).astype("int64").to_numpy()
+
+
+def calendar_columns(timestamps):
+    """hour, day_of_week, is_weekend, is_working_hour and season codes as int8 arrays"""
+    timestamps = pd.DatetimeIndex(timestamps)
+    hour = timestamps.hour.to_numpy().astype(np.int8)
+    day_of_week = timestamps.dayofweek.to_numpy().astype(np.int8)
+    is_weekend = day_of_week >= 5
+    return {
+        "hour": hour,
+        "day_of_week": day_of_week,
+        "is_weekend": is_weekend.astype(np.int8),
+        "is_working_hour": ((hour >= 8) & (hour <= 18) & ~is_weekend).astype(np.int8),
+        "season": MONTH_TO_SEASON[timestamps.month.to_numpy()],
+    }
+
+
+def to_int32(values, name):
+    """Cast ids to int32, refusing values that would wrap"""
+    info = np.iinfo(np.int32)
+    if len(values) and (values.min() < info.min or values.max() > info.max):
+        raise ValueError(f"{name} values must fit in int32")
+    return values.astype(np.int32)
+
+
+def sort_order(server_id, service, timestamps):
+    """
+    Stable order by (server_id, service_description, Timestamp), NaT last.
+
+    Each key is replaced by its dense rank so the three keys fit one int64 and
+    a single stable argsort does the work of a three-key lexsort.
+    """
+    ranks, sizes = [], []
+    for values in (server_id, service, timestamps):
+        codes, uniques = pd.factorize(values, sort=True)
+        codes = codes.astype(np.int64)
+        codes[codes < 0] = len(uniques)  # missing sorts last, like pandas
+        ranks.append(codes)
+        sizes.append(len(uniques) + 1)
+
+    if np.prod(sizes, dtype=float) > np.iinfo(np.int64).max:
+        return np.lexsort(ranks[::-1])
+
+    key = ranks[0]
+    for codes, size in zip(ranks[1:], sizes[1:]):
+        key *= size
+        key += codes
+    return np.argsort(key, kind="stable")
+
+
+def server_buckets(server_id, n_buckets):
+    """Stable bucket per server_id (same in every process and run)"""
+    server_id = np.asarray(server_id, dtype=np.int64)
+    return (pd.util.hash_array(server_id) % np.uint64(n_buckets)).astype(np.int64)
+
+
+def split_by_server(df, n_parts):
+    """Split df into up to n_parts non-empty frames, each holding whole servers"""
+    buckets = server_buckets(df["server_id"].to_numpy(), n_parts)
+    order = np.argsort(buckets, kind="stable")
+    bounds = np.flatnonzero(np.diff(buckets[order])) + 1
+    return [df.iloc[rows] for rows in np.split(order, bounds) if len(rows)]
+
+
+def normalize_raw(df):
+    """
+    Give a raw chunk the same schema whatever its contents: encoded service,
+    parsed Timestamp, float64 for the other numeric columns (NaN-safe).
+    build_features casts them to their final dtypes after dropping NaN rows.
+    """
+    df = df.drop(columns=DROP_COLUMNS, errors="ignore")
+    df["service_description"] = encode(df["service_description"], service_description_mapping)
+    df["Timestamp"] = pd.to_datetime(df["Timestamp"], errors="coerce")
+    df = df.astype({"server_id": "int64", "service_description": "int64"})
+    if "season" in df.columns:
+        df["season"] = df["season"].astype("object")
+    for col in DTYPES:
+        if col not in SERIES_KEYS and col in df.columns:
+            df[col] = df[col].astype("float64")
+    return df
+
+
+def build_features(df):
+    """
+    Encode categories, add time_gap_minutes and cpu_lag_1..3, drop incomplete rows.
+
+    Same result as the original pandas steps (astype, sort_values, groupby diff,
+    groupby("server_id").shift, dropna, season map), including their quirks:
+    time gaps restart per (server_id, service_description), lags only per
+    server_id. Each output column is gathered from the input exactly once.
+    An unknown service_description or a missing server_id raises ValueError,
+    as the original astype("int64") did.
+    """
+    columns = [col for col in df.columns if col not in DROP_COLUMNS]
+
+    # -------- sort keys (the only columns converted up front) --------
+    services = encode(df["service_description"], service_description_mapping)
+    server_id = int_keys(df["server_id"], "server_id")
+    service = int_keys(services, "service_description").astype(np.int8)
+    timestamps = pd.to_datetime(df["Timestamp"], errors="coerce").to_numpy(dtype="datetime64[ns]")
+
+    order = sort_order(server_id, service, timestamps)
+    server_id = server_id[order]
+    service = service[order]
+    ts = timestamps[order]
+    cpu = df["CPU_percent"].to_numpy(dtype=np.float32)[order]
+    n = len(order)
+
+    # -------- rows to keep (dropna over every column) --------
+    # Own columns: one missing mask over the unsorted input, gathered once
+    missing = np.isnat(timestamps)
+    for col in columns:
+        if col not in ("service_description", "Timestamp") and df[col].dtype.kind not in "biu":
+            missing |= df[col].isna().to_numpy()
+    keep = ~missing[order]
+
+    # Lags: the three previous rows of the same server exist and have a CPU value
+    # (sorted by server, so row i-3 of the same server means i-1..i-3 are too)
+    cpu_missing = np.isnan(cpu)
+    keep[:N_LAGS] = False
+    keep[N_LAGS:] &= server_id[N_LAGS:] == server_id[:-N_LAGS]
+    for k in range(1, N_LAGS + 1):
+        keep[k:] &= ~cpu_missing[:-k]
+
+    # Time gap: previous row is the same (server, service) and has a timestamp
+    keep[1:] &= service[1:] == service[:-1]
+    keep[1:] &= ~np.isnat(ts[:-1])
+
+    positions = np.flatnonzero(keep)
+    rows = order[positions]
+    del order, keep, missing, cpu_missing, server_id
+
+    # -------- gather every column once, straight into its compact type --------
+    out = {}
+    for col in columns:
+        if col == "Timestamp":
+            out[col] = ts[positions]
+        elif col == "service_description":
+            out[col] = service[positions]
+        elif col == "season":
+            # Labels -> int8 codes (float32 if some label is unknown)
+            season = encode(df[col], season_mapping).to_numpy()[rows]
+            out[col] = season.astype(np.float32 if np.isnan(season).any() else np.int8)
+        elif col in ("server_id", "service_id"):
+            out[col] = to_int32(df[col].to_numpy()[rows], col)
+        elif col in DTYPES:
+            out[col] = df[col].to_numpy()[rows].astype(DTYPES[col], copy=False)
+        else:
+            out[col] = df[col].to_numpy()[rows]
+    del service
+
+    # Calendar columns the client left out come from the kept rows' timestamps
+    derived = [col for col in CALENDAR_COLUMNS if col not in df.columns]
+    if derived:
+        calendar = calendar_columns(out["Timestamp"])
+        for col in derived:
+            out[col] = calendar[col]
+
+    gap = (out["Timestamp"] - ts[positions - 1]).view(np.int64).astype(np.float64)
+    gap /= 1e9
+    gap /= 60
+    out["time_gap_minutes"] = gap.astype(np.float32)
+    del ts, gap
+    for k in range(1, N_LAGS + 1):
+        out[f"cpu_lag_{k}"] = cpu[positions - k]
+
+    # copy=False: keep the gathered arrays as they are instead of consolidating
+    return pd.DataFrame(out, index=df.index[rows], copy=False)
+
+
+def iter_features(chunks):
+    """
+    build_features over a sorted stream of raw chunks, chunk by chunk.
+
+    The last N_LAGS raw rows of each chunk are carried into the next one: they
+    hold the last three CPU values and the last timestamp of the series that
+    crosses the boundary, which is all the lags and time gap of the next rows
+    need. Output matches build_features on the concatenated input as long as
+    the stream is sorted by (server_id, service_description, Timestamp).
+    """
+    carry = None
+    offset = 0
+    for chunk in chunks:
+        start = offset
+        offset += len(chunk)
+        chunk.index = pd.RangeIndex(start, offset)
+
+        if carry is not None:
+            chunk = pd.concat([carry, chunk])
+        carry = chunk.iloc[-N_LAGS:]
+
+        features = build_features(chunk)
+        yield features[features.index >= start]
+
+
+WATERMARK_COLUMNS = ["server_id", "service_description", "Timestamp", "cpu_1", "cpu_2", "cpu_3"]
+
+
+def series_watermarks(df):
+    """
+    Per-series state for incremental preparation: last Timestamp and last
+    three CPU values (cpu_1 newest, NaN if the series is shorter) of every
+    (server_id, service_description) in a raw or normalized frame.
+    """
+    services = encode(df["service_description"], service_description_mapping)
+    timestamps = pd.to_datetime(df["Timestamp"], errors="coerce").to_numpy(dtype="datetime64[ns]")
+    valid = ~np.isnat(timestamps)
+
+    server_id = int_keys(df["server_id"], "server_id")[valid]
+    service = int_keys(services, "service_description")[valid]
+    timestamps = timestamps[valid]
+    cpu = df["CPU_percent"].to_numpy(dtype=np.float32)[valid]
+
+    order = sort_order(server_id, service, timestamps)
+    server_id, service, timestamps, cpu = server_id[order], service[order], timestamps[order], cpu[order]
+
+    last = np.ones(len(order), dtype=bool)
+    last[:-1] = (server_id[1:] != server_id[:-1]) | (service[1:] != service[:-1])
+    ends = np.flatnonzero(last)
+
+    out = {
+        "server_id": server_id[ends],
+        "service_description": service[ends],
+        "Timestamp": timestamps[ends],
+    }
+    starts = np.append(0, ends[:-1] + 1)
+    for k in range(N_LAGS):
+        positions = ends - k
+        out[f"cpu_{k + 1}"] = np.where(positions >= starts, cpu[np.maximum(positions, 0)], np.nan).astype(np.float32)
+    return pd.DataFrame(out, columns=WATERMARK_COLUMNS)
+
+
+def watermark_rows(watermarks):
+    """N_LAGS normalized raw rows per series rebuilt from its watermark, oldest first"""
+    n = len(watermarks)
+    cpu = np.stack([watermarks[f"cpu_{k}"].to_numpy() for k in range(N_LAGS, 0, -1)], axis=1)
+    return pd.DataFrame({
+        "server_id": np.repeat(watermarks["server_id"].to_numpy(), N_LAGS),
+        "service_description": np.repeat(watermarks["service_description"].to_numpy(), N_LAGS),
+        "Timestamp": np.repeat(watermarks["Timestamp"].to_numpy(), N_LAGS),
+        "CPU_percent": cpu.ravel().astype(np.float64),
+    }, index=pd.RangeIndex(-n * N_LAGS, 0))
+
+
+def build_incremental(df, watermarks):
+    """
+    build_features for the rows of a raw frame newer than their series'
+    watermark. Each series' watermark is put back in front of its new rows
+    as N_LAGS raw rows, so the lags and time gap continue from the last run.
+    Returns (features, updated watermarks, rows skipped as already processed).
+    """
+    df = normalize_raw(df).reset_index(drop=True)
+
+    seen = df[["server_id", "service_description"]].merge(
+        watermarks[["server_id", "service_description", "Timestamp"]],
+        on=["server_id", "service_description"], how="left"
+    )["Timestamp"].to_numpy()
+    # Series without a watermark (NaT) are new: all their rows are processed
+    new = np.isnat(seen) | (df["Timestamp"].to_numpy() > seen)
+    skipped = int((~new).sum())
+    df = df[new]
+
+    keys = pd.MultiIndex.from_frame(df[["server_id", "service_description"]])
+    carried = watermarks[pd.MultiIndex.from_frame(watermarks[["server_id", "service_description"]]).isin(keys)]
+    combined = pd.concat([watermark_rows(carried), df])
+
+    features = build_features(combined)
+    features = features[features.index >= 0]
+
+    updated = series_watermarks(combined)
+    merged = pd.concat([watermarks, updated]).drop_duplicates(["server_id", "service_description"], keep="last")
+    merged = merged.sort_values(["server_id", "service_description"], ignore_index=True)
+    return features, merged, skipped
+
+
+def series_bounds(server_id, service):
+    """(starts, ends) row positions of each series in sorted key columns"""
+    new_series = np.ones(len(server_id), dtype=bool)
+    new_series[1:] = (server_id[1:] != server_id[:-1]) | (service[1:] != service[:-1])
+    starts = np.flatnonzero(new_series)
+    ends = np.append(starts[1:], len(server_id)) if len(starts) else starts
+    return starts, ends
+
+
+class SeriesIndex:
+    """
+    Offset table over a prepared frame: (server_id, service_description) ->
+    (first row, end row). build_features output is already sorted, so building
+    it is one pass over the key columns and every lookup is a dict access.
+    """
+
+    def __init__(self, df):
+        server_id = df["server_id"].to_numpy()
+        service = df["service_description"].to_numpy()
+        if not self._is_sorted(server_id, service, df["Timestamp"].to_numpy()):
+            df = df.sort_values(SERIES_KEYS, kind="stable")
+            server_id = df["server_id"].to_numpy()
+            service = df["service_description"].to_numpy()
+
+        self.df = df
+        starts, ends = series_bounds(server_id, service)
+        keys = zip(server_id[starts].tolist(), service[starts].tolist())
+        self.offsets = dict(zip(keys, zip(starts.tolist(), ends.tolist())))
+
+    @staticmethod
+    def _is_sorted(server_id, service, timestamps):
+        if len(server_id) < 2:
+            return True
+        same_server = server_id[1:] == server_id[:-1]
+        same_series = same_server & (service[1:] == service[:-1])
+        return bool((
+            (server_id[1:] > server_id[:-1])
+            | (same_server & (service[1:] > service[:-1]))
+            | (same_series & (timestamps[1:] >= timestamps[:-1]))
+        ).all())
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __contains__(self, key):
+        return key in self.offsets
+
+    def rows(self, server_id, service_description):
+        """All rows of one series, oldest first"""
+        start, end = self.offsets[(server_id, service_description)]
+        return self.df.iloc[start:end]
+
+    def last_positions(self, keys):
+        """Row position of each series' latest row, -1 where the series is absent"""
+        return np.array([self.offsets.get(key, (0, 0))[1] - 1 for key in keys], dtype=np.int64)
+
+    def column(self, name):
+        return self.df[name].to_numpy()
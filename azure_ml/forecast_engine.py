@@ -0,0 +1,157 @@
+"""
+Recursive forecast engine
+Rolls the lag features forward with the model one step (30 minutes by default) at a time
+"""
+
+import time
+import numpy as np
+import pandas as pd
+
+from features import CALENDAR_COLUMNS, calendar_columns
+
+
+# Column order the model was trained on
+FEATURES = [
+    "cpu_lag_1", "cpu_lag_2", "cpu_lag_3",
+    "time_gap_minutes", "hour", "day_of_week",
+    "is_weekend", "is_working_hour", "season",
+    "service_description"
+]
+
+STEP_MINUTES = 30
+
+
+def make_predictor(model):
+    """
+    Return a function that maps a float32 feature matrix to predictions.
+    XGBoost models are fed through the booster directly, skipping the
+    sklearn wrapper's DataFrame handling.
+    """
+    if not hasattr(model, "get_booster"):
+        return model.predict
+
+    booster = model.get_booster()
+    try:
+        iteration_range = (0, int(model.best_iteration) + 1)
+    except AttributeError:
+        iteration_range = (0, 0)
+
+    def predict(X):
+        return booster.inplace_predict(X, iteration_range=iteration_range)
+
+    return predict
+
+
+def forecast_start(start=None, step_minutes=STEP_MINUTES):
+    """First forecast timestamp: the requested start, or the current step-grid slot"""
+    if start is not None:
+        return pd.Timestamp(start)
+    return pd.Timestamp.now().floor(f"{step_minutes}min")
+
+
+def future_timestamps(start, steps, step_minutes=STEP_MINUTES):
+    """Timestamps of every step of the horizon"""
+    return pd.date_range(start=start, periods=steps, freq=f"{step_minutes}min")
+
+
+def calendar_features(timestamps, service_description, step_minutes=STEP_MINUTES):
+    """
+    Build the feature matrix for the whole horizon at once.
+    Everything except the three lag columns is known up front.
+    """
+    calendar = calendar_columns(timestamps)
+
+    X = np.empty((len(timestamps), len(FEATURES)), dtype=np.float32)
+    X[:, 3] = float(step_minutes)  # time_gap_minutes is forced to the step size
+    for col in CALENDAR_COLUMNS:
+        X[:, FEATURES.index(col)] = calendar[col]
+    X[:, 9] = service_description
+    return X
+
+
+def recursive_forecast(predict, lags, service_description, start, steps,
+                       step_minutes=STEP_MINUTES, deadline=None):
+    """
+    Forecast one series for `steps` steps starting at `start`.
+
+    lags: (cpu_lag_1, cpu_lag_2, cpu_lag_3) of the last observed row.
+    Returns (timestamps, predictions) with predictions as float32.
+    """
+    timestamps, predictions = recursive_forecast_many(
+        predict, [lags], [service_description], start, steps,
+        step_minutes=step_minutes, deadline=deadline
+    )
+    return timestamps, predictions[0]
+
+
+def recursive_forecast_many(predict, lags, service_descriptions, start, steps,
+                            step_minutes=STEP_MINUTES, deadline=None):
+    """
+    Forecast N series in lockstep: one N-row model call per step.
+
+    lags: N rows of (cpu_lag_1, cpu_lag_2, cpu_lag_3).
+    service_descriptions: N encoded service codes.
+    deadline: time.monotonic() value after which no new step is started;
+    the horizon computed so far is returned (fewer than `steps` columns).
+    Returns (timestamps, predictions) with predictions of shape (N, steps).
+    """
+    timestamps = future_timestamps(start, steps, step_minutes)
+    predictions = np.empty((len(service_descriptions), steps), dtype=np.float32)
+
+    done = 0
+    for _, block in iter_recursive_forecast(
+        predict, lags, service_descriptions, start, steps,
+        block_size=max(steps, 1), step_minutes=step_minutes, deadline=deadline
+    ):
+        predictions[:, done:done + block.shape[1]] = block
+        done += block.shape[1]
+
+    return timestamps[:done], predictions[:, :done]
+
+
+def iter_recursive_forecast(predict, lags, service_descriptions, start, steps,
+                            block_size=48, step_minutes=STEP_MINUTES, deadline=None):
+    """
+    Same as recursive_forecast_many, but yields (timestamps, predictions)
+    every `block_size` steps as the recursion advances. Only one block of
+    predictions is held at a time. Past the deadline the partial block is
+    yielded and iteration stops.
+    """
+    lags = np.asarray(lags, dtype=np.float32).reshape(-1, 3)
+    n_series = len(lags)
+
+    timestamps = future_timestamps(start, steps, step_minutes)
+    calendar = calendar_features(timestamps, 0, step_minutes)
+
+    # history[:, j:j + 3] holds (lag_3, lag_2, lag_1) for step j of the block,
+    # history[:, 3:] ends up holding the block's predictions
+    history = np.empty((n_series, block_size + 3), dtype=np.float32)
+    history[:, :3] = lags[:, ::-1]
+
+    X = np.empty((n_series, len(FEATURES)), dtype=np.float32)
+    X[:, 9] = service_descriptions
+
+    for block_start in range(0, steps, block_size):
+        block_steps = min(block_size, steps - block_start)
+        expired = False
+
+        for j in range(block_steps):
+            if deadline is not None and time.monotonic() >= deadline:
+                block_steps, expired = j, True
+                break
+            X[:, 0] = history[:, j + 2]
+            X[:, 1] = history[:, j + 1]
+            X[:, 2] = history[:, j]
+            X[:, 3:9] = calendar[block_start + j, 3:9]
+            history[:, j + 3] = predict(X)
+
+        if block_steps:
+            yield (
+                timestamps[block_start:block_start + block_steps],
+                history[:, 3:3 + block_steps].copy()
+            )
+        if expired:
+            return
+
+        # Carry the last three values over as the next block's lags
+        history[:, :3] = history[:, block_steps:block_steps + 3]
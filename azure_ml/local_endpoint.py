@@ -0,0 +1,148 @@
+"""
+Local stand-in for the managed online endpoint
+Imports score.py, calls init() with AZUREML_MODEL_DIR pointing at a local
+model folder and serves run() over HTTP with the deployed contract:
+POST /score with a JSON body and an "Authorization: Bearer <key>" header,
+the response body is what run() returns. GET / answers like the liveness probe.
+
+By default it schedules run() like the managed inference server: --workers
+processes (WORKER_COUNT), each calling init() itself and handling one request
+at a time, with no keep-alive. Latency and throughput measured this way are
+comparable to a deployment with the same worker count. --threaded instead
+serves every connection on its own thread in one process. That is not how the
+endpoint runs, but it is the way to exercise score.py's micro-batching.
+To run the real server instead:
+    AZUREML_MODEL_DIR=.. azmlinfsrv --entry_script score.py --port 5001
+
+Usage (then point benchmark_endpoint.py at http://127.0.0.1:5001/score):
+    python local_endpoint.py --model_dir .. --port 5001 --key local-key --workers 2
+"""
+
+import argparse
+import json
+import os
+import signal
+import sys
+from http.server import BaseHTTPRequestHandler, HTTPServer, ThreadingHTTPServer
+
+
+class ScoringHandler(BaseHTTPRequestHandler):
+    # One request per connection, like the inference server's sync workers;
+    # TCP_NODELAY so the body isn't held back behind the header write
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        if self.path != "/":
+            return self.send_body(404, json.dumps({"error": "Not found"}))
+        self.send_body(200, "Healthy", "text/plain")
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.path.split("?")[0] != "/score":
+            return self.send_body(404, json.dumps({"error": "Not found"}))
+
+        key = self.server.key
+        if key and self.headers.get("Authorization") != f"Bearer {key}":
+            return self.send_body(401, json.dumps({"error": "Invalid or missing bearer key"}))
+
+        self.send_body(200, self.server.score.run(body.decode("utf-8")))
+
+    def send_body(self, status, text, content_type="application/json"):
+        body = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class KeepAliveScoringHandler(ScoringHandler):
+    # Threaded mode: connections stay open, one thread each
+    protocol_version = "HTTP/1.1"
+
+
+def load_score(model_dir):
+    """score.py, initialized from model_dir"""
+    os.environ["AZUREML_MODEL_DIR"] = os.path.abspath(model_dir)
+    import score
+    score.init()
+    return score
+
+
+def make_server(host="127.0.0.1", port=5001, key=None, verbose=False, threaded=False):
+    """Listening HTTP server for score.py; set server.score before serving"""
+    if threaded:
+        server = ThreadingHTTPServer((host, port), KeepAliveScoringHandler)
+        server.daemon_threads = True
+    else:
+        server = HTTPServer((host, port), ScoringHandler)
+    server.score = None
+    server.key = key
+    server.verbose = verbose
+    return server
+
+
+def serve_workers(server, model_dir, workers):
+    """
+    Fork `workers` processes that each init() score.py and take requests,
+    one at a time, from the shared listening socket
+    """
+    children = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                server.score = load_score(model_dir)
+                server.serve_forever()
+            finally:
+                os._exit(0)
+        children.append(pid)
+
+    # Stopping the parent (Ctrl+C or SIGTERM) stops the workers
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        for pid in children:
+            os.waitpid(pid, 0)
+    finally:
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model_dir", type=str, default=os.getenv("AZUREML_MODEL_DIR", ".."),
+                        help="Folder with the model files, as mounted at AZUREML_MODEL_DIR")
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5001)
+    parser.add_argument("--key", type=str, default=os.getenv("ENDPOINT_KEY"),
+                        help="Require 'Authorization: Bearer <key>' (default: no auth)")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WORKER_COUNT", "1")),
+                        help="Worker processes, one request at a time each (like WORKER_COUNT)")
+    parser.add_argument("--threaded", action="store_true",
+                        help="One process, a thread per connection (exercises micro-batching)")
+    parser.add_argument("--verbose", action="store_true", help="Log every request")
+    args = parser.parse_args()
+
+    if args.threaded and args.workers > 1:
+        parser.error("--threaded runs a single process; leave --workers at 1")
+
+    server = make_server(args.host, args.port, args.key, args.verbose, args.threaded)
+    mode = "threaded" if args.threaded else f"{args.workers} worker(s)"
+    print(f"Scoring on http://{args.host}:{args.port}/score ({mode})")
+    try:
+        if args.threaded:
+            server.score = load_score(args.model_dir)
+            server.serve_forever()
+        else:
+            serve_workers(server, args.model_dir, args.workers)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,111 @@
+"""
+Micro-batching for concurrent model calls
+Requests that arrive while the model is busy are queued and scored together
+in one predict call, then the predictions are split back per request
+"""
+
+import threading
+from collections import deque
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class _Lead:
+    """Handed to a waiting caller: score this batch (yours first) for everyone"""
+
+    def __init__(self, batch):
+        self.batch = batch
+
+
+class MicroBatcher:
+    """
+    Thread-safe wrapper around predict(X) for float32 feature matrices.
+
+    A caller that finds the model idle scores its own rows right away, so
+    a lone request pays nothing extra. Callers that arrive while the model
+    is busy queue their rows; when the model frees up, the first of them
+    scores everything queued (up to max_rows) in one predict call and hands
+    each caller its slice. No background thread, so it is safe across fork().
+    """
+
+    def __init__(self, predict, max_rows=1024):
+        self._predict = predict
+        self.max_rows = max_rows
+
+        self._pending = deque()  # (X, Future) of callers waiting for the model
+        self._busy = False
+        self._lock = threading.Lock()
+
+        self.requests = 0
+        self.batches = 0
+        self.rows = 0
+
+    def predict(self, X):
+        """Predictions for the rows of X, scored together with concurrent callers"""
+        if len(X) == 0:
+            return self._predict(X)
+
+        with self._lock:
+            if self._busy:
+                future = Future()
+                self._pending.append((X, future))
+            else:
+                self._busy = True
+                future = None
+
+        if future is None:
+            batch = [(X, None)]
+        else:
+            result = future.result()
+            if not isinstance(result, _Lead):
+                return result
+            batch = result.batch
+
+        try:
+            return self._score(batch)
+        finally:
+            self._hand_over()
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "rows": self.rows,
+            "requests_per_batch": self.requests / self.batches if self.batches else 0.0,
+        }
+
+    def _score(self, batch):
+        """Predict a batch in one call; returns the first caller's predictions"""
+        matrices = [X for X, _ in batch]
+        try:
+            X = matrices[0] if len(matrices) == 1 else np.concatenate(matrices)
+            predictions = self._predict(X)
+        except Exception as e:
+            for _, future in batch[1:]:
+                future.set_exception(e)
+            raise
+
+        with self._lock:
+            self.requests += len(batch)
+            self.batches += 1
+            self.rows += len(X)
+
+        start = len(matrices[0])
+        for X, future in batch[1:]:
+            future.set_result(predictions[start:start + len(X)])
+            start += len(X)
+        return predictions[:len(matrices[0])]
+
+    def _hand_over(self):
+        """Pass the model to the oldest waiting caller, with what is queued behind it"""
+        with self._lock:
+            if not self._pending:
+                self._busy = False
+                return
+            batch = [self._pending.popleft()]
+            rows = len(batch[0][0])
+            while self._pending and rows + len(self._pending[0][0]) <= self.max_rows:
+                batch.append(self._pending.popleft())
+                rows += len(batch[-1][0])
+        batch[0][1].set_result(_Lead(batch))
@@ -0,0 +1,103 @@
+"""
+Model loading for the scoring script and the API
+Prefers the booster in XGBoost's native binary format (UBJSON), which loads
+without unpickling and does not depend on the versions of the libraries the
+model was pickled with; falls back to the joblib pickle. A synthetic warm-up
+prediction pays the first-call costs before the service reports ready.
+
+Export the native file next to an existing pickle:
+    python model_loader.py ../xgboost_cpu_forecaster.pkl
+"""
+
+import glob
+import os
+import sys
+import time
+
+import joblib
+import numpy as np
+import xgboost as xgb
+
+from forecast_engine import FEATURES
+from tree_ensemble import sample_features
+
+MODEL_FILE = "xgboost_cpu_forecaster.pkl"
+NATIVE_MODEL_FILE = "xgboost_cpu_forecaster.ubj"
+
+
+def native_path(model_path):
+    """Native-format file published alongside a pickle"""
+    return os.path.join(os.path.dirname(model_path), NATIVE_MODEL_FILE)
+
+
+def export_native(model_path, output_path=None):
+    """Save the pickled model's booster in the native binary format"""
+    output_path = output_path or native_path(model_path)
+    joblib.load(model_path).save_model(output_path)
+    return output_path
+
+
+def find_model_file(model_dir, names, search_subfolders=False):
+    """
+    First of names (in order of preference) directly in model_dir; then, with
+    search_subfolders, one folder below it (a model registered as a folder is
+    mounted as AZUREML_MODEL_DIR/<folder>/...). None if missing.
+    """
+    for name in names:
+        path = os.path.join(model_dir, name)
+        if os.path.exists(path):
+            return path
+    if search_subfolders:
+        for name in names:
+            matches = sorted(glob.glob(os.path.join(model_dir, "*", name)))
+            if matches:
+                return matches[0]
+    return None
+
+
+def load_model(model_dir, search_subfolders=False):
+    """
+    The model from model_dir, native format first, then the pickle.
+    Files directly in model_dir always win over those in a subfolder, which
+    are only considered with search_subfolders (AZUREML_MODEL_DIR).
+    """
+    path = find_model_file(model_dir, [NATIVE_MODEL_FILE, MODEL_FILE], search_subfolders)
+    if path is None:
+        raise ValueError(f"No {NATIVE_MODEL_FILE} or {MODEL_FILE} in {model_dir}")
+    if path.endswith(NATIVE_MODEL_FILE):
+        model = xgb.XGBRegressor()
+        model.load_model(path)
+    else:
+        model = joblib.load(path)
+    print(f"Loaded model from {path}")
+    return model
+
+
+def warm_up(predict, sizes=(1, 64)):
+    """Synthetic predictions of the given batch sizes, results discarded"""
+    for rows in sizes:
+        X = sample_features(rows)[FEATURES].to_numpy(dtype=np.float32)
+        predict(X)
+
+
+class StartupTimer:
+    """Wall time of each startup phase, printed as one line"""
+
+    def __init__(self, started_at=None):
+        self.last = started_at if started_at is not None else time.perf_counter()
+        self.phases = []
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+
+    def report(self):
+        total = sum(seconds for _, seconds in self.phases)
+        phases = ", ".join(f"{phase} {seconds:.3f}s" for phase, seconds in self.phases)
+        print(f"Startup {total:.3f}s: {phases}")
+
+
+if __name__ == "__main__":
+    model_path = sys.argv[1] if len(sys.argv) > 1 else MODEL_FILE
+    print(f"Wrote {export_native(model_path)}")
@@ -6,84 +6,192 @@ Preprocesses raw data for model training
 import pandas as pd
 import argparse
 import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 
+import numpy as np
 
-service_description_mapping = {
-    "CPU_Usage": 1,
-    "Windows_CPU_Usage": 2,
-    "CPU_Usage_SQL": 3
-}
+from features import (
+    N_LAGS,
+    build_features,
+    build_incremental,
+    iter_features,
+    series_watermarks,
+    split_by_server
+)
+from raw_loader import load_raw
 
-season_mapping = {
-    "winter": 0, "spring": 1, "summer": 2, "autumn": 3,
-    "Winter": 0, "Spring": 1, "Summer": 2, "Autumn": 3
-}
 
+def save_prepared(df, output_data, output_format, part=0):
+    """Write one part of the prepared data; part 0 starts a new file/dataset"""
+    if output_format == "csv":
+        os.makedirs(os.path.dirname(output_data), exist_ok=True)
+        df.to_csv(output_data, index=False, mode="w" if part == 0 else "a", header=part == 0)
+    else:
+        # Folder of Parquet files bucketed by server_id, schema in _common_metadata
+        from prepared_dataset import reset_dataset, write_partitions
+        if part == 0:
+            reset_dataset(output_data)
+        write_partitions(df, output_data, part)
 
-def prepare_data(input_data, output_data):
-    """Prepare and preprocess data"""
+
+def save_watermarks(watermarks, output_data, output_format):
+    """Parquet datasets keep per-series watermarks for --incremental runs"""
+    if output_format == "parquet":
+        from prepared_dataset import write_watermarks
+        write_watermarks(watermarks, output_data)
+
+
+def build_features_parallel(df, workers):
+    """
+    build_features with one process per server_id hash partition.
+    Servers never span partitions, so putting the partition outputs back in
+    server_id order gives exactly the serial result.
+    """
+    parts = split_by_server(df, workers)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(build_features, parts)
+        results = [part for part in results if len(part)]
+    if not results:
+        return build_features(df.iloc[:0])
+
+    merged = pd.concat(results)
+    order = np.argsort(merged["server_id"].to_numpy(), kind="stable")
+    return merged.iloc[order]
+
+
+def prepare_data(input_data, output_data, output_format="parquet", workers=1, feature_store=None):
+    """Prepare and preprocess data; feature_store also writes a serving copy there"""
     
     print(f"Loading data from {input_data}")
-    df = pd.read_csv(input_data)
+    df = load_raw(input_data)
     print(f"Loaded {len(df)} rows")
+    watermarks = series_watermarks(df) if output_format == "parquet" else None
     
-    # Drop unnecessary columns
-    df = df.drop(columns=["parallel_flag", "unique_services"], errors="ignore")
-    
-    # Map service_description
-    if df["service_description"].dtype == 'object':
-        df["service_description"] = df["service_description"].map(service_description_mapping)
-    
-    # Convert Timestamp
-    df["Timestamp"] = pd.to_datetime(df["Timestamp"], errors="coerce")
-    
-    # Set data types
-    df = df.astype({
-        "server_id": "int64",
-        "service_id": "int64",
-        "service_description": "int64",
-        "CPU_percent": "float32",
-        "hour": "int8",
-        "day_of_week": "int8",
-        "is_weekend": "int8",
-        "is_working_hour": "int8",
-    })
-    
-    # Sort data
-    df = df.sort_values(["server_id", "service_description", "Timestamp"])
-    
-    # Calculate time gaps
-    df["time_gap_minutes"] = (
-        df.groupby(["server_id", "service_description"])["Timestamp"]
-          .diff()
-          .dt.total_seconds()
-          .div(60)
-    )
-    
-    # Create lag features
-    df["cpu_lag_1"] = df.groupby("server_id")["CPU_percent"].shift(1)
-    df["cpu_lag_2"] = df.groupby("server_id")["CPU_percent"].shift(2)
-    df["cpu_lag_3"] = df.groupby("server_id")["CPU_percent"].shift(3)
-    
-    # Drop NaN
-    df = df.dropna()
-    
-    # Map season
-    if df["season"].dtype == 'object':
-        df["season"] = df["season"].map(season_mapping)
+    # Encode, sort, time gaps, lags, drop NaN (shared with api/server.py)
+    if workers > 1:
+        print(f"Building features with {workers} worker processes")
+        df = build_features_parallel(df, workers)
+    else:
+        df = build_features(df)
     
     print(f"Prepared {len(df)} rows")
     
     # Save
-    os.makedirs(os.path.dirname(output_data), exist_ok=True)
-    df.to_csv(output_data, index=False)
+    save_prepared(df, output_data, output_format)
+    save_watermarks(watermarks, output_data, output_format)
     print(f"Saved to {output_data}")
 
+    if feature_store:
+        from feature_store import write_feature_store
+        write_feature_store(df, feature_store)
+        print(f"Wrote feature store to {feature_store}")
+
+
+def track_watermarks(chunks, watermarks):
+    """Pass sorted chunks through, appending each chunk's series watermarks"""
+    tail = None
+    for chunk in chunks:
+        rows = chunk if tail is None else pd.concat([tail, chunk])
+        watermarks.append(series_watermarks(rows))
+        tail = rows.iloc[-N_LAGS:]
+        yield chunk
+
+
+def prepare_data_chunked(input_data, output_data, chunk_rows, output_format="parquet", tmp_dir=None):
+    """
+    Same output as prepare_data, for raw files larger than memory.
+    Memory is bounded by chunk_rows, not by the size of the file.
+    """
+    import pyarrow.parquet as pq
+    from external_sort import ROW_COLUMN, external_sort
+
+    work_dir = tempfile.mkdtemp(prefix="prepare_", dir=tmp_dir)
+    try:
+        # 1. Sort the raw CSV by (server_id, service_description, Timestamp) on disk
+        sorted_path = os.path.join(work_dir, "sorted.parquet")
+        external_sort(input_data, sorted_path, chunk_rows, tmp_dir=work_dir)
+
+        # 2. Time gaps and lags chunk by chunk, carrying series state across chunks
+        batches = pq.ParquetFile(sorted_path).iter_batches(batch_size=chunk_rows)
+        chunks = (batch.to_pandas().drop(columns=[ROW_COLUMN]) for batch in batches)
+        watermarks = []
+
+        rows = 0
+        if output_format == "parquet":
+            chunks = track_watermarks(chunks, watermarks)
+        for part, df in enumerate(iter_features(chunks)):
+            save_prepared(df, output_data, output_format, part)
+            rows += len(df)
+        if watermarks:
+            watermarks = pd.concat(watermarks).drop_duplicates(
+                ["server_id", "service_description"], keep="last"
+            )
+            save_watermarks(watermarks.reset_index(drop=True), output_data, output_format)
+        print(f"Prepared {rows} rows")
+        print(f"Saved to {output_data}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def prepare_data_incremental(input_data, output_data):
+    """
+    Append features for samples newer than the last run to a Parquet dataset.
+    Only the rows of input_data after their series' watermark are processed,
+    so the cost follows the amount of new data, not the full history.
+    """
+    from prepared_dataset import next_part, read_watermarks, write_partitions, write_watermarks
+
+    watermarks = read_watermarks(output_data)
+    print(f"Loaded watermarks for {len(watermarks)} series")
+
+    print(f"Loading data from {input_data}")
+    df = load_raw(input_data)
+    print(f"Loaded {len(df)} rows")
+
+    df, watermarks, skipped = build_incremental(df, watermarks)
+    print(f"Skipped {skipped} rows at or before their watermark")
+    print(f"Prepared {len(df)} new rows")
+
+    if len(df):
+        write_partitions(df, output_data, next_part(output_data))
+    write_watermarks(watermarks, output_data)
+    print(f"Appended to {output_data}")
+
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--input_data", type=str)
     parser.add_argument("--output_data", type=str)
+    parser.add_argument("--output_format", choices=["parquet", "csv"], default="parquet",
+                        help="parquet: folder partitioned by server_id bucket; csv: single file")
+    parser.add_argument("--chunk_rows", type=int, default=0,
+                        help="Process the file out of core, this many rows at a time (0 = all in memory)")
+    parser.add_argument("--tmp_dir", type=str, default=None,
+                        help="Where to spill sorted runs (default: system temp dir)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Build features in this many processes, partitioned by server_id")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Append only rows newer than the watermarks of an existing Parquet output")
+    parser.add_argument("--feature_store", type=str, default=None,
+                        help="Also write the features as a memory-mapped store for api/server.py")
     args = parser.parse_args()
     
-    prepare_data(args.input_data, args.output_data)
+    if args.chunk_rows > 0 and args.workers > 1:
+        parser.error("--workers is not supported together with --chunk_rows")
+    
+    if args.incremental and (args.output_format != "parquet" or args.chunk_rows > 0 or args.workers > 1):
+        parser.error("--incremental works on Parquet output, without --chunk_rows or --workers")
+    
+    if args.feature_store and (args.incremental or args.chunk_rows > 0):
+        parser.error("--feature_store needs the whole prepared frame: build it with feature_store.py instead")
+    
+    if args.incremental:
+        prepare_data_incremental(args.input_data, args.output_data)
+    elif args.chunk_rows > 0:
+        prepare_data_chunked(args.input_data, args.output_data, args.chunk_rows,
+                             args.output_format, args.tmp_dir)
+    else:
+        prepare_data(args.input_data, args.output_data, args.output_format, args.workers,
+                     args.feature_store)
@@ -0,0 +1,111 @@
+"""
+Partitioned Parquet storage for prepared features
+Rows are split into buckets by a hash of server_id (bucket=NN/ folders) and
+the schema is written next to them in _common_metadata, so readers get the
+int8/float32 dtypes back and can load only the columns and servers they need.
+"""
+
+import glob
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from features import server_buckets
+
+N_BUCKETS = 16
+SCHEMA_FILE = "_common_metadata"
+WATERMARK_FILE = "_watermarks.parquet"
+BUCKET_FIELD = "bucket"
+
+
+def bucket_dir(path, bucket):
+    return os.path.join(path, f"{BUCKET_FIELD}={bucket:02d}")
+
+
+def reset_dataset(path):
+    """Empty path for a new dataset; only ever deletes a previous prepared dataset"""
+    if os.path.isdir(path) and os.listdir(path):
+        if not os.path.exists(os.path.join(path, SCHEMA_FILE)):
+            raise ValueError(f"{path} is not empty and is not a prepared dataset")
+        shutil.rmtree(path)
+    os.makedirs(path, exist_ok=True)
+
+
+def write_partitions(df, path, part=0, n_buckets=N_BUCKETS):
+    """
+    Append df to the dataset at path as part-<part>.parquet in each bucket.
+    Writes the schema file on the first call.
+    """
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    schema_path = os.path.join(path, SCHEMA_FILE)
+    if not os.path.exists(schema_path):
+        metadata = dict(table.schema.metadata or {}, n_buckets=str(n_buckets))
+        pq.write_metadata(table.schema.with_metadata(metadata), schema_path)
+
+    buckets = server_buckets(df["server_id"].to_numpy(), n_buckets)
+    order = np.argsort(buckets, kind="stable")
+    bounds = np.flatnonzero(np.diff(buckets[order])) + 1
+    for rows in np.split(order, bounds):
+        if len(rows) == 0:
+            continue
+        folder = bucket_dir(path, int(buckets[rows[0]]))
+        os.makedirs(folder, exist_ok=True)
+        pq.write_table(table.take(rows), os.path.join(folder, f"part-{part:05d}.parquet"))
+
+
+def write_prepared(df, path, n_buckets=N_BUCKETS):
+    """Write a whole prepared frame as a new partitioned dataset"""
+    reset_dataset(path)
+    write_partitions(df, path, n_buckets=n_buckets)
+
+
+def next_part(path):
+    """Part number that doesn't clash with any file already in the dataset"""
+    parts = glob.glob(os.path.join(path, f"{BUCKET_FIELD}=*", "part-*.parquet"))
+    numbers = [int(os.path.basename(f)[len("part-"):-len(".parquet")]) for f in parts]
+    return max(numbers, default=-1) + 1
+
+
+def write_watermarks(watermarks, path):
+    """Per-series state the next incremental run continues from"""
+    watermarks.to_parquet(os.path.join(path, WATERMARK_FILE), index=False)
+
+
+def read_watermarks(path):
+    watermark_path = os.path.join(path, WATERMARK_FILE)
+    if not os.path.exists(watermark_path):
+        raise ValueError(f"No watermarks in {path}: run a full prepare_data into it first")
+    return pd.read_parquet(watermark_path)
+
+
+def read_schema(path):
+    return pq.read_schema(os.path.join(path, SCHEMA_FILE))
+
+
+def read_prepared(path, columns=None, server_ids=None):
+    """
+    Load a prepared dataset (or part of it) as a DataFrame.
+
+    columns: only read these columns
+    server_ids: only open the buckets these servers hash to, and keep their rows
+    """
+    schema = read_schema(path)
+    filter = None
+    if server_ids is None:
+        files = sorted(glob.glob(os.path.join(path, f"{BUCKET_FIELD}=*", "*.parquet")))
+    else:
+        server_ids = [int(s) for s in server_ids]
+        n_buckets = int(schema.metadata[b"n_buckets"])
+        files = []
+        for bucket in sorted(set(server_buckets(server_ids, n_buckets))):
+            files += sorted(glob.glob(os.path.join(bucket_dir(path, bucket), "*.parquet")))
+        filter = ds.field("server_id").isin(server_ids)
+
+    dataset = ds.dataset(files, schema=schema, format="parquet")
+    table = dataset.to_table(columns=columns, filter=filter)
+    return table.to_pandas()
@@ -0,0 +1,115 @@
+"""
+Shared loader for raw telemetry CSV files
+Reads with pyarrow's multithreaded CSV parser using a declared schema, only
+the columns that are needed, and parses each distinct Timestamp string once
+with the known format (strings in other formats are handed to pandas).
+"""
+
+import urllib.request
+import warnings
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Declared types of the raw export; integer columns may contain empty cells
+RAW_SCHEMA = {
+    "server_id": pa.int32(),
+    "Timestamp": pa.dictionary(pa.int32(), pa.string()),
+    "service_id": pa.int32(),
+    "service_description": pa.dictionary(pa.int32(), pa.string()),
+    "CPU_percent": pa.float64(),
+    "hour": pa.int8(),
+    "day_of_week": pa.int8(),
+    "is_weekend": pa.int8(),
+    "is_working_hour": pa.int8(),
+    "season": pa.dictionary(pa.int32(), pa.string()),
+    "parallel_flag": pa.int8(),
+    "unique_services": pa.int32(),
+}
+
+# Label columns come back as pandas categoricals: one copy of each string
+LABEL_COLUMNS = ["service_description", "season"]
+
+# What feature preparation reads (parallel_flag and unique_services are dropped)
+FEATURE_COLUMNS = [col for col in RAW_SCHEMA if col not in ("parallel_flag", "unique_services")]
+
+
+def parse_timestamps(timestamps):
+    """
+    Dictionary-encoded Timestamp strings -> timestamp[ns], parsing each distinct
+    string once. Strings not in TIMESTAMP_FORMAT (e.g. ISO "T" separators) get
+    a second try with pd.to_datetime(errors="coerce"); what that can't parse
+    becomes null.
+    """
+    if isinstance(timestamps, pa.ChunkedArray):
+        timestamps = timestamps.combine_chunks()
+    dictionary = timestamps.dictionary
+    parsed = pc.strptime(dictionary, format=TIMESTAMP_FORMAT, unit="ns", error_is_null=True)
+
+    failed = np.flatnonzero(
+        parsed.is_null().to_numpy(zero_copy_only=False) & dictionary.is_valid().to_numpy(zero_copy_only=False)
+    )
+    if len(failed):
+        values = parsed.to_numpy(zero_copy_only=False)
+        with warnings.catch_warnings():
+            # Unparseable strings make pandas warn about dateutil; they end up null
+            warnings.simplefilter("ignore", UserWarning)
+            retried = pd.to_datetime(pd.Series(dictionary.take(failed).to_pylist()), errors="coerce")
+        if retried.dt.tz is not None:
+            retried = retried.dt.tz_convert(None)
+        values[failed] = retried.to_numpy(dtype="datetime64[ns]")
+        parsed = pa.array(values, type=pa.timestamp("ns"))
+    return parsed.take(timestamps.indices)
+
+
+def open_source(source):
+    """Local path or (SAS) URL"""
+    if isinstance(source, str) and source.startswith(("http://", "https://")):
+        return urllib.request.urlopen(source)
+    return source
+
+
+def read_header(source):
+    with pa_csv.open_csv(open_source(source)) as reader:
+        return reader.schema.names
+
+
+def load_raw(source, columns=FEATURE_COLUMNS, categorical=True):
+    """
+    Raw telemetry as a DataFrame with parsed Timestamp.
+    columns: columns to read (those missing from the file are skipped);
+    None reads every column.
+    categorical: False returns the label columns as plain strings (object),
+    e.g. to serialize them.
+    """
+    names = read_header(source)
+    include = names if columns is None else [col for col in columns if col in names]
+
+    column_types = {col: RAW_SCHEMA[col] for col in include if col in RAW_SCHEMA}
+    if not categorical:
+        column_types.update({col: pa.string() for col in LABEL_COLUMNS if col in column_types})
+    convert = pa_csv.ConvertOptions(column_types=column_types, include_columns=include)
+    try:
+        table = pa_csv.read_csv(
+            open_source(source),
+            read_options=pa_csv.ReadOptions(use_threads=True),
+            convert_options=convert,
+        )
+    except pa.ArrowInvalid as e:
+        # Values that don't fit the declared schema (e.g. "4.0" in hour):
+        # fall back to pandas' type inference rather than fail
+        print(f"Raw schema mismatch ({e}), falling back to pandas parser")
+        df = pd.read_csv(open_source(source), usecols=include)
+        if "Timestamp" in df.columns:
+            df["Timestamp"] = pd.to_datetime(df["Timestamp"], errors="coerce")
+        return df
+
+    if "Timestamp" in table.column_names:
+        position = table.column_names.index("Timestamp")
+        table = table.set_column(position, "Timestamp", parse_timestamps(table["Timestamp"]))
+    return table.to_pandas(split_blocks=True, self_destruct=True)
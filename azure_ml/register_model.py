@@ -2,9 +2,26 @@
 Register XGBoost Model in Azure ML
 """
 
+import os
+import shutil
+import tempfile
+
 from azure.ai.ml.entities import Model
 from azure.ai.ml.constants import AssetTypes
 from azure_config import get_ml_client, MODEL_NAME, MODEL_VERSION
+from model_loader import MODEL_FILE, NATIVE_MODEL_FILE, export_native
+
+
+def stage_model_files(model_path, stage_dir):
+    """
+    Folder with the pickle and the same booster in XGBoost's native format;
+    score.py loads the native file and keeps the pickle as a fallback
+    """
+    folder = os.path.join(stage_dir, os.path.splitext(MODEL_FILE)[0])
+    os.makedirs(folder)
+    shutil.copy(model_path, os.path.join(folder, MODEL_FILE))
+    export_native(model_path, os.path.join(folder, NATIVE_MODEL_FILE))
+    return folder
 
 
 def register_model(model_path="xgboost_cpu_forecaster.pkl"):
@@ -20,15 +37,31 @@ def register_model(model_path="xgboost_cpu_forecaster.pkl"):
     print(f"Registering model: {MODEL_NAME} (version {MODEL_VERSION})")
     print(f"Model path: {model_path}")
     
-    # Register model
+    stage_dir = tempfile.mkdtemp(prefix="register_model_")
+    try:
+        registered_model = create_model(client, stage_model_files(model_path, stage_dir))
+    finally:
+        shutil.rmtree(stage_dir, ignore_errors=True)
+    
+    print(f"✅ Model registered successfully!")
+    print(f"   Name: {registered_model.name}")
+    print(f"   Version: {registered_model.version}")
+    print(f"   ID: {registered_model.id}")
+    
+    return registered_model
+
+
+def create_model(client, model_folder):
+    """Upload the model folder as a new model version"""
     model = Model(
-        path=model_path,  # Path to your saved model on compute instance
+        path=model_folder,  # Pickle + native booster, staged by stage_model_files
         name=MODEL_NAME,
         version=MODEL_VERSION,
         type=AssetTypes.CUSTOM_MODEL,
         description="XGBoost model for CPU usage forecasting (14-day ahead)",
         properties={
             "model_type": "xgboost",
+            "model_files": f"{NATIVE_MODEL_FILE} (native), {MODEL_FILE} (pickle)",
             "task": "time_series_forecasting",
             "input_features": "cpu_lag_1, cpu_lag_2, cpu_lag_3, time_gap_minutes, hour, day_of_week, is_weekend, is_working_hour, season, service_description",
             "output": "predicted_CPU_percent",
@@ -37,14 +70,7 @@ def register_model(model_path="xgboost_cpu_forecaster.pkl"):
         }
     )
     
-    registered_model = client.models.create_or_update(model)
-    
-    print(f"✅ Model registered successfully!")
-    print(f"   Name: {registered_model.name}")
-    print(f"   Version: {registered_model.version}")
-    print(f"   ID: {registered_model.id}")
-    
-    return registered_model
+    return client.models.create_or_update(model)
 
 
 if __name__ == "__main__":
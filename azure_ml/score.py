@@ -3,22 +3,55 @@ Scoring script for Azure ML endpoint
 This script runs predictions on the deployed model
 """
 
+import time
+started_at = time.perf_counter()
+
 import json
+import numpy as np
 import pandas as pd
-import joblib
 import os
 from datetime import datetime
+from operator import itemgetter
+
+from features import SeriesIndex, build_features
+from forecast_engine import (
+    FEATURES, STEP_MINUTES, forecast_start, make_predictor, recursive_forecast_many
+)
+from micro_batch import MicroBatcher
+from model_loader import StartupTimer, load_model, warm_up
+from tree_ensemble import load_backend
+
+# Values of one request row in the model's feature order
+row_features = itemgetter(*FEATURES)
 
 
 def init():
     """
     Initialize the model when endpoint starts
     """
-    global model, service_description_mapping, season_mapping
+    global model, predict, batcher, service_description_mapping, season_mapping
+    
+    # Module imports ran when the server loaded this script
+    timer = StartupTimer(started_at)
+    timer.mark("imports")
     
-    # Load the model
-    model_path = os.path.join(os.getenv("AZUREML_MODEL_DIR"), "xgboost_cpu_forecaster.pkl")
-    model = joblib.load(model_path)
+    # Load the model (native XGBoost format if published, else the pickle)
+    # INFERENCE_BACKEND=native swaps XGBoost for the array-backed tree evaluator
+    # (a folder-registered model sits one folder below AZUREML_MODEL_DIR)
+    model = load_backend(
+        load_model(os.getenv("AZUREML_MODEL_DIR"), search_subfolders=True),
+        os.getenv("INFERENCE_BACKEND", "xgboost")
+    )
+    predict = make_predictor(model)
+    timer.mark("model load")
+    
+    # Concurrent run() calls share model calls: rows of requests that arrive
+    # while the model is busy are scored in one batch (MICRO_BATCH_MAX_ROWS=0 disables)
+    max_rows = int(os.getenv("MICRO_BATCH_MAX_ROWS", "1024"))
+    batcher = None
+    if max_rows > 0:
+        batcher = MicroBatcher(predict, max_rows=max_rows)
+        predict = batcher.predict
     
     # Mappings
     service_description_mapping = {
@@ -32,7 +65,88 @@ def init():
         "Winter": 0, "Spring": 1, "Summer": 2, "Autumn": 3
     }
     
+    # Pay first-call costs before the endpoint reports ready
+    warm_up(predict)
+    timer.mark("warm-up")
+    
     print("Model loaded successfully")
+    timer.report()
+
+
+def forecast_horizon(data):
+    """
+    Horizon mode: recursive forecast of one or more series, computed here
+    instead of one request per step. Same inputs and result as the API's
+    /forecast (api/server.py forecast_14_days): raw observations in "df",
+    the series in server_id + service_description_str (or "targets"),
+    horizon_steps steps of step_minutes from start (default: current slot).
+    """
+    if "targets" in data:
+        targets = [(int(t["server_id"]), t["service_description_str"]) for t in data["targets"]]
+    else:
+        targets = [(int(data["server_id"]), data["service_description_str"])]
+
+    steps = int(data["horizon_steps"])
+    step_minutes = int(data.get("step_minutes", STEP_MINUTES))
+    if steps < 1 or step_minutes < 1:
+        raise ValueError("horizon_steps and step_minutes must be positive")
+
+    for _, service_description_str in targets:
+        if service_description_str not in service_description_mapping:
+            raise ValueError(f"Unknown service_description_str: {service_description_str}")
+    services = np.array([service_description_mapping[t[1]] for t in targets], dtype=np.int64)
+
+    # Lags of each series' last preprocessed row, as the API does
+    index = SeriesIndex(build_features(pd.DataFrame(data["df"])))
+    positions = index.last_positions(list(zip([t[0] for t in targets], services.tolist())))
+    for (server_id, service_description_str), position in zip(targets, positions):
+        if position < 0:
+            raise ValueError(f"No data found for server {server_id} + service {service_description_str}")
+    lags = np.column_stack([index.column(f"cpu_lag_{k + 1}")[positions] for k in range(3)])
+
+    timestamps, predictions = recursive_forecast_many(
+        predict, lags, services,
+        forecast_start(data.get("start"), step_minutes), steps,
+        step_minutes=step_minutes
+    )
+
+    timestamps = timestamps.strftime("%Y-%m-%d %H:%M:%S").tolist()
+    return [
+        {
+            "Timestamp": timestamp,
+            "server_id": server_id,
+            "service_description": service_description_str,
+            "predicted_CPU_percent": prediction
+        }
+        for (server_id, service_description_str), row in zip(targets, predictions.tolist())
+        for timestamp, prediction in zip(timestamps, row)
+    ]
+
+
+def decode_rows(rows):
+    """
+    Request rows -> float32 feature matrix in FEATURES order, filled row by
+    row into one preallocated array (no DataFrame, no per-column lists).
+    Raises KeyError/TypeError/ValueError for rows that aren't plain numbers.
+    """
+    return np.fromiter(map(row_features, rows), dtype=(np.float32, len(FEATURES)), count=len(rows))
+
+
+def encode_predictions(predictions, input_count):
+    """
+    Response body written straight from the prediction array; same text as
+    json.dumps of {"predictions": predictions.tolist(), ...}
+    """
+    values = predictions.astype(np.float64)
+    if not np.isfinite(values).all():
+        # json spells these NaN/Infinity
+        body = json.dumps(values.tolist())
+    else:
+        body = "[" + ", ".join(map(float.__repr__, values)) + "]"
+    return (
+        f'{{"predictions": {body}, "input_count": {input_count}, '
+        f'"timestamp": "{datetime.utcnow().isoformat()}"}}'
+    )
 
 
 def run(raw_data):
@@ -57,34 +171,42 @@ def run(raw_data):
             }
         ]
     }
+    
+    Horizon mode (the whole recursive forecast in one call, see forecast_horizon):
+    {
+        "df": [
+            {"server_id": 638939, "Timestamp": "2025-11-03 10:00:00",
+             "service_description": "CPU_Usage", "CPU_percent": 42.8},
+            ...
+        ],
+        "server_id": 638939,
+        "service_description_str": "CPU_Usage",
+        "horizon_steps": 672
+    }
     """
     try:
         data = json.loads(raw_data)
         
-        # Convert input to DataFrame
-        df = pd.DataFrame(data["data"])
-        
-        # Prepare features for model
-        features = [
-            "cpu_lag_1", "cpu_lag_2", "cpu_lag_3",
-            "time_gap_minutes", "hour", "day_of_week",
-            "is_weekend", "is_working_hour", "season",
-            "service_description"
-        ]
-        
-        X = df[features]
+        if "horizon_steps" in data:
+            forecast = forecast_horizon(data)
+            return json.dumps({
+                "forecast": forecast,
+                "input_count": len(data["df"]),
+                "timestamp": datetime.utcnow().isoformat()
+            })
         
-        # Make predictions
-        predictions = model.predict(X)
-        
-        # Format response
-        results = {
-            "predictions": predictions.tolist(),
-            "input_count": len(df),
-            "timestamp": datetime.utcnow().isoformat()
-        }
+        rows = data["data"]
+        try:
+            # Fast path: numbers straight into the model's feature matrix
+            X = decode_rows(rows)
+        except (KeyError, TypeError, ValueError):
+            # Nulls or other values the matrix can't hold: go through a
+            # DataFrame as before, which also reports what is wrong
+            predictions = model.predict(pd.DataFrame(rows)[FEATURES])
+        else:
+            predictions = predict(X)
         
-        return json.dumps(results)
+        return encode_predictions(predictions, len(rows))
     
     except Exception as e:
         return json.dumps({"error": str(e)})
@@ -0,0 +1,208 @@
+"""
+Array-backed tree evaluator
+Exports the trained XGBoost booster into flat NumPy arrays and evaluates
+them without going through XGBoost, for low-latency small-batch inference
+"""
+
+import json
+import numpy as np
+import pandas as pd
+
+
+# Objectives whose prediction is the raw margin (no link function)
+IDENTITY_OBJECTIVES = {
+    "reg:squarederror", "reg:absoluteerror",
+    "reg:pseudohubererror", "reg:quantileerror"
+}
+
+
+# Trees are padded to perfect binary trees, so deeper models cost 2**depth per tree
+MAX_DEPTH = 12
+
+
+class TreeEnsemble:
+    """
+    All trees of a booster padded to perfect binary trees of the same depth
+    and stored level-order in flat arrays. Every row then walks every tree
+    with a fixed number of vectorized steps and no per-node branching.
+    """
+
+    def __init__(self, feature, threshold, default_left, value,
+                 depth, base_score, feature_names):
+        self.feature = feature
+        self.threshold = threshold
+        self.default_left = default_left
+        self.value = value
+        self.depth = depth
+        self.base_score = np.float32(base_score)
+        self.feature_names = feature_names
+
+        # Global index of each node's left child (right child is the next one);
+        # children of the bottom internal level index straight into `value`
+        n_internal = 2 ** depth - 1
+        self.n_trees = len(value) // 2 ** depth
+        tree = np.repeat(np.arange(self.n_trees, dtype=np.intp), n_internal)
+        pos = np.tile(np.arange(n_internal, dtype=np.intp), self.n_trees)
+        left = 2 * pos + 1
+        self.left_child = np.where(
+            left < n_internal,
+            tree * n_internal + left,
+            tree * 2 ** depth + left - n_internal
+        )
+        self.roots = np.arange(self.n_trees, dtype=np.intp) * n_internal
+
+    @classmethod
+    def from_model(cls, model):
+        """Export the trees of a fitted XGBRegressor (or Booster)"""
+        booster = model.get_booster() if hasattr(model, "get_booster") else model
+        learner = json.loads(booster.save_raw("json"))["learner"]
+
+        objective = learner["objective"]["name"]
+        if objective not in IDENTITY_OBJECTIVES:
+            raise ValueError(f"Unsupported objective for native backend: {objective}")
+
+        gbm = learner["gradient_booster"]
+        if gbm["name"] != "gbtree":
+            raise ValueError(f"Unsupported booster for native backend: {gbm['name']}")
+
+        trees = gbm["model"]["trees"]
+        try:
+            # Same tree range the sklearn wrapper uses after early stopping
+            n_trees = gbm["model"]["iteration_indptr"][int(model.best_iteration) + 1]
+            trees = trees[:n_trees]
+        except AttributeError:
+            pass
+
+        depth = max(_tree_depth(tree) for tree in trees)
+        if depth > MAX_DEPTH:
+            raise ValueError(f"Trees of depth {depth} are too deep for the native backend")
+
+        n_internal = 2 ** depth - 1
+        # Padding nodes send everything left (x < inf, missing -> left)
+        feature = np.zeros((len(trees), n_internal), dtype=np.intp)
+        threshold = np.full((len(trees), n_internal), np.inf, dtype=np.float32)
+        default_left = np.ones((len(trees), n_internal), dtype=bool)
+        value = np.zeros((len(trees), 2 ** depth), dtype=np.float32)
+
+        for t, tree in enumerate(trees):
+            if any(tree["split_type"]):
+                raise ValueError("Categorical splits are not supported by the native backend")
+
+            # (node id in the XGBoost tree, position in the padded tree, level)
+            stack = [(0, 0, 0)]
+            while stack:
+                node, pos, level = stack.pop()
+                left = tree["left_children"][node]
+                if left == -1:
+                    # Leaf: its weight sits at the leftmost bottom position below it,
+                    # split_conditions holds the (already scaled) leaf weight
+                    pos = (pos + 1) * 2 ** (depth - level) - 1
+                    value[t, pos - n_internal] = tree["split_conditions"][node]
+                    continue
+                feature[t, pos] = tree["split_indices"][node]
+                threshold[t, pos] = tree["split_conditions"][node]
+                default_left[t, pos] = bool(tree["default_left"][node])
+                stack.append((left, 2 * pos + 1, level + 1))
+                stack.append((tree["right_children"][node], 2 * pos + 2, level + 1))
+
+        base_score = float(learner["learner_model_param"]["base_score"].strip("[]"))
+
+        return cls(
+            feature=feature.ravel(),
+            threshold=threshold.ravel(),
+            default_left=default_left.ravel(),
+            value=value.ravel(),
+            depth=depth,
+            base_score=base_score,
+            feature_names=booster.feature_names,
+        )
+
+    def predict(self, X):
+        """Predict for a 2D feature matrix or a DataFrame with the model's columns"""
+        if isinstance(X, pd.DataFrame) and self.feature_names is not None:
+            X = X[self.feature_names]
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+
+        n_rows, n_features = X.shape
+        values = X.ravel()
+        row_offset = (np.arange(n_rows, dtype=np.intp) * n_features)[:, None]
+        has_missing = np.isnan(values).any()
+
+        node = np.broadcast_to(self.roots, (n_rows, self.n_trees))
+        for _ in range(self.depth):
+            x = values[row_offset + self.feature[node]]
+            if has_missing:
+                go_right = ~((x < self.threshold[node]) | (np.isnan(x) & self.default_left[node]))
+            else:
+                go_right = x >= self.threshold[node]
+            node = self.left_child[node] + go_right
+
+        # XGBoost adds tree outputs one by one in float32 on top of base_score;
+        # cumsum keeps that order so results match bit for bit
+        leaves = np.empty((n_rows, self.n_trees + 1), dtype=np.float32)
+        leaves[:, 0] = self.base_score
+        leaves[:, 1:] = self.value[node]
+        return np.cumsum(leaves, axis=1, dtype=np.float32)[:, -1]
+
+
+def _tree_depth(tree):
+    """Depth of one tree from the XGBoost JSON dump"""
+    left, right = tree["left_children"], tree["right_children"]
+    level = {0: 0}
+    for node in range(len(left)):
+        if left[node] != -1:
+            level[left[node]] = level[node] + 1
+            level[right[node]] = level[node] + 1
+    return max(level.values())
+
+
+def check_equivalence(model, ensemble, X, atol=1e-4):
+    """
+    Compare the native backend against model.predict on X.
+    Returns the largest absolute difference, raises if it exceeds atol.
+    """
+    expected = model.predict(X)
+    actual = ensemble.predict(X)
+    max_diff = float(np.max(np.abs(expected - actual))) if len(expected) else 0.0
+    if max_diff > atol:
+        raise ValueError(f"Native backend differs from model.predict by {max_diff}")
+    return max_diff
+
+
+def sample_features(n_rows=256, seed=0):
+    """Random feature rows covering the value ranges seen in production"""
+    rng = np.random.default_rng(seed)
+    hour = rng.integers(0, 24, n_rows)
+    day_of_week = rng.integers(0, 7, n_rows)
+    is_weekend = day_of_week >= 5
+    return pd.DataFrame({
+        "cpu_lag_1": rng.uniform(0, 100, n_rows),
+        "cpu_lag_2": rng.uniform(0, 100, n_rows),
+        "cpu_lag_3": rng.uniform(0, 100, n_rows),
+        "time_gap_minutes": rng.choice([30.0, 60.0, 90.0], n_rows),
+        "hour": hour,
+        "day_of_week": day_of_week,
+        "is_weekend": is_weekend.astype(int),
+        "is_working_hour": ((hour >= 8) & (hour <= 18) & ~is_weekend).astype(int),
+        "season": rng.integers(0, 4, n_rows),
+        "service_description": rng.integers(1, 4, n_rows),
+    })
+
+
+def load_backend(model, backend="xgboost"):
+    """
+    Return the object used for inference.
+    backend="native" exports the trees and verifies them against model.predict.
+    """
+    if backend == "xgboost":
+        return model
+    if backend != "native":
+        raise ValueError(f"Unknown inference backend: {backend}")
+
+    ensemble = TreeEnsemble.from_model(model)
+    max_diff = check_equivalence(model, ensemble, sample_features())
+    print(f"Native tree backend ready: {ensemble.n_trees} trees, "
+          f"max abs diff vs model.predict {max_diff:.2e}")
+    return ensemble
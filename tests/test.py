@@ -1,9 +1,13 @@
 import requests
 import pandas as pd
 import os
+import sys
 
 # Get the root directory of the deploy folder
 ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "azure_ml"))
+
+from raw_loader import load_raw
 
 # ===============================================
 # CONFIGURATION VARIABLES
@@ -18,29 +22,20 @@ OUTPUT_FILE = os.path.join(ROOT_DIR, "data", "forecast_results.csv")
 # LOAD RAW DATA
 # ===============================================
 print(f"Loading data from {DATA_FILE}...")
-df = pd.read_csv(DATA_FILE)
+df = load_raw(DATA_FILE, columns=None, categorical=False)
 print(f"Total rows: {len(df)}")
 
 # Filter data for target server only (to reduce data size)
 df = df[df["server_id"] == TARGET_SERVER_ID]
 print(f"Rows for server {TARGET_SERVER_ID}: {len(df)}")
 
-# Convert Timestamp to string for JSON serialization
+# Convert Timestamp (parsed by load_raw) to string for JSON serialization
 if "Timestamp" in df.columns:
-    df["Timestamp"] = pd.to_datetime(df["Timestamp"], errors="coerce")
     df["Timestamp"] = df["Timestamp"].dt.strftime("%Y-%m-%d %H:%M:%S")
 
-# Keep only the raw columns needed (server will create lag features)
-raw_columns = ["server_id", "Timestamp", "service_id", "service_description", 
-               "CPU_percent", "hour", "day_of_week", "is_weekend", 
-               "is_working_hour", "season"]
-
-# Include optional columns if they exist
-optional_cols = ["parallel_flag", "unique_services"]
-for col in optional_cols:
-    if col in df.columns:
-        raw_columns.append(col)
-
+# Keep only the raw columns needed: the server derives lag features and
+# the calendar columns (hour, day_of_week, ..., season) from Timestamp
+raw_columns = ["server_id", "Timestamp", "service_description", "CPU_percent"]
 df = df[raw_columns]
 
 # Fill NaN values to make JSON serialization possible
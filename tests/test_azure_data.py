@@ -135,19 +135,9 @@ def send_forecast_request(df):
         df["Timestamp"] = pd.to_datetime(df["Timestamp"], errors="coerce")
         df["Timestamp"] = df["Timestamp"].dt.strftime("%Y-%m-%d %H:%M:%S")
     
-    # Keep only the raw columns needed (server will create lag features)
-    raw_columns = ["server_id", "Timestamp", "service_id", "service_description", 
-                   "CPU_percent", "hour", "day_of_week", "is_weekend", 
-                   "is_working_hour", "season"]
-    
-    # Include optional columns if they exist
-    optional_cols = ["parallel_flag", "unique_services"]
-    for col in optional_cols:
-        if col in df.columns:
-            raw_columns.append(col)
-    
-    # Filter to existing columns only
-    raw_columns = [col for col in raw_columns if col in df.columns]
+    # Keep only the raw columns needed: the server derives lag features and
+    # the calendar columns (hour, day_of_week, ..., season) from Timestamp
+    raw_columns = ["server_id", "Timestamp", "service_description", "CPU_percent"]
     df = df[raw_columns]
     
     # Fill NaN values to make JSON serialization possible
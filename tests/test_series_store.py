@@ -0,0 +1,88 @@
+"""
+Regression tests for the /ingest series store: its last-row features must
+match preprocess_data on the same history, including re-sent samples and
+missing CPU values
+Run with: python tests/test_series_store.py (or pytest)
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "api"))
+sys.path.insert(0, os.path.join(ROOT_DIR, "azure_ml"))
+
+from features import build_features, service_description_mapping
+from series_store import SeriesStore
+
+
+def sample_history(n=40):
+    """One series of 30-minute samples with distinct CPU values"""
+    return pd.DataFrame({
+        "server_id": 1,
+        "service_description": "CPU_Usage",
+        "Timestamp": pd.date_range("2025-11-03 08:00", periods=n, freq="30min"),
+        "CPU_percent": np.arange(n, dtype=np.float64) + 10.0,
+    })
+
+
+def expected_latest(df):
+    """Last-row features as preprocess_data computes them"""
+    last = build_features(df).iloc[-1]
+    return (last["cpu_lag_1"], last["cpu_lag_2"], last["cpu_lag_3"], last["time_gap_minutes"])
+
+
+def stored_latest(store):
+    last = store.latest(1, "CPU_Usage")
+    return (last["cpu_lag_1"], last["cpu_lag_2"], last["cpu_lag_3"], last["time_gap_minutes"])
+
+
+def test_resending_tail_is_idempotent():
+    df = sample_history()
+    store = SeriesStore(service_description_mapping, capacity=64)
+    store.ingest(df)
+    store.ingest(df.tail(10))
+    assert stored_latest(store) == expected_latest(df)
+
+
+def test_overlapping_ingest_adds_only_new_samples():
+    df = sample_history()
+    store = SeriesStore(service_description_mapping, capacity=64)
+    store.ingest(df.iloc[:30])
+    store.ingest(df.iloc[25:])
+    assert stored_latest(store) == expected_latest(df)
+
+
+def test_duplicate_timestamp_keeps_newest_value():
+    df = sample_history()
+    store = SeriesStore(service_description_mapping, capacity=64)
+    store.ingest(df)
+    corrected = df.tail(2).assign(CPU_percent=[99.0, 98.0])
+    store.ingest(corrected)
+    expected = pd.concat([df.iloc[:-2], corrected])
+    assert stored_latest(store) == expected_latest(expected)
+
+
+def test_duplicates_within_one_request():
+    df = sample_history()
+    store = SeriesStore(service_description_mapping, capacity=64)
+    store.ingest(pd.concat([df, df.tail(5)]))
+    assert stored_latest(store) == expected_latest(df)
+
+
+def test_missing_cpu_value_breaks_lags():
+    df = sample_history(10)
+    df.loc[7, "CPU_percent"] = np.nan
+    store = SeriesStore(service_description_mapping, capacity=64)
+    store.ingest(df)
+    assert stored_latest(store) == expected_latest(df)
+    assert store.latest(1, "CPU_Usage")["Timestamp"] == build_features(df)["Timestamp"].iloc[-1]
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"✓ {name}")
@@ -6,9 +6,13 @@ For when you have a SAS token from Azure Storage
 import requests
 import pandas as pd
 import os
+import sys
 
 # Get the root directory of the deploy folder
 ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "azure_ml"))
+
+from raw_loader import load_raw
 
 # ===============================================
 # CONFIGURATION VARIABLES
@@ -36,7 +40,7 @@ def load_data():
     if AZURE_BLOB_URL_WITH_SAS:
         try:
             print(f"📥 Loading data from Azure Blob Storage...")
-            df = pd.read_csv(AZURE_BLOB_URL_WITH_SAS)
+            df = load_raw(AZURE_BLOB_URL_WITH_SAS, columns=None, categorical=False)
             print(f"✅ Successfully loaded {len(df)} rows from Azure")
             return df
         except Exception as e:
@@ -46,7 +50,7 @@ def load_data():
     # Fallback to local file
     try:
         print(f"📂 Loading data from local file: {LOCAL_DATA_FILE}")
-        df = pd.read_csv(LOCAL_DATA_FILE)
+        df = load_raw(LOCAL_DATA_FILE, columns=None, categorical=False)
         print(f"✅ Successfully loaded {len(df)} rows from local file")
         return df
     except Exception as e:
@@ -68,9 +72,8 @@ def send_forecast_request(df):
         print(f"❌ No data found for server_id {TARGET_SERVER_ID}")
         return None
     
-    # Convert Timestamp to string for JSON serialization
+    # Convert Timestamp (parsed by load_raw) to string for JSON serialization
     if "Timestamp" in df.columns:
-        df["Timestamp"] = pd.to_datetime(df["Timestamp"], errors="coerce")
         df["Timestamp"] = df["Timestamp"].dt.strftime("%Y-%m-%d %H:%M:%S")
     
     # Keep only the raw columns needed